@@ -1,8 +1,11 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 import os
 from typing import Any, Dict
-from retrievers.pipeline import search
+from graphdb.schema import ensure_schema
+from retrievers.pipeline import async_search, async_search_profiled, close_async_client, search_cache, SEARCH_OPTION_KEYS
+import time
 import json
 
 app = FastAPI(title="Trace-It API", version="0.1.0")
@@ -11,14 +14,39 @@ class RunReq(BaseModel):
     query: str
     opts: Dict[str, Any] | None = None
 
+@app.on_event("startup")
+async def _graph_schema():
+    # idempotent; the API still serves search if Neo4j is down
+    try:
+        await run_in_threadpool(ensure_schema)
+    except Exception as e:
+        print(f"[graphdb.schema] not applied: {e}")
+
+@app.on_event("shutdown")
+async def _close_search_client():
+    await close_async_client()
+
 @app.get("/healthz")
-def health():
+async def health():
     return {"ok": True}
 
+@app.get("/api/cache")
+async def cache_stats():
+    return search_cache.stats()
+
 @app.post("/api/run")
-def run(req: RunReq):
+async def run(req: RunReq):
     q = req.query.strip()
-    hits = search(q)
+    t0 = time.perf_counter()
+    opts = {k: v for k, v in (req.opts or {}).items() if k in SEARCH_OPTION_KEYS}
+    profile = None
+    try:
+        if (req.opts or {}).get("profile"):
+            hits, profile = await async_search_profiled(q, opts)
+        else:
+            hits = await async_search(q, opts)
+    except (TypeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"invalid opts: {e}")
     # Build simple answer + citations as in verify_guard
     def mk_citations(hs):
         cits = []
@@ -28,7 +56,7 @@ def run(req: RunReq):
             cits.append({
                 "type": kind,
                 "path": p,
-                "lines": [1,1],
+                "lines": [h.get("start_line") or 1, h.get("end_line") or h.get("start_line") or 1],
                 "repo": h.get("repo"),
                 "sha": h.get("sha"),
                 "source_env": h.get("source_env","legacy")
@@ -47,11 +75,16 @@ def run(req: RunReq):
         answer = "\n".join(lines)
         cits = mk_citations(hits)
 
+    raw_state = {"hits": hits}
+    if profile is not None:
+        profile["api_ms"] = round((time.perf_counter() - t0) * 1000, 3)
+        raw_state["profile"] = profile
+
     return {
         "thread_id": "thr_local",
         "final_answer": answer,
         "citations": cits,
         "steps": [],
         "graph": {"nodes": [], "edges": []},
-        "raw_state": {"hits": hits}
+        "raw_state": raw_state
     }
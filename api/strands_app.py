@@ -1,4 +1,5 @@
 from fastapi import FastAPI, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from typing import Any, Dict, List
 import traceback
@@ -6,11 +7,15 @@ import time
 
 # Import the enhanced agent
 from orchestrators.answer_agent import AnswerAgent, plan
+from retrievers.pipeline import async_search, async_search_profiled, close_async_client
+from tools.retriever_tool import SEARCH_OPTS
+from graphdb.schema import ensure_schema
 
 app = FastAPI(title="Legacy Codebase Assistant", version="2.0")
 
 class RunRequest(BaseModel):
     query: str
+    opts: Dict[str, Any] | None = None
 
 class CitationResponse(BaseModel):
     type: str  # "code", "sql", "doc"
@@ -36,18 +41,39 @@ class RunResponse(BaseModel):
     graph: Dict[str, Any] = {"nodes": [], "edges": []}
     raw_state: Dict[str, Any]
 
+@app.on_event("startup")
+async def _graph_schema():
+    # idempotent; the API still serves search if Neo4j is down
+    try:
+        await run_in_threadpool(ensure_schema)
+    except Exception as e:
+        print(f"[graphdb.schema] not applied: {e}")
+
+@app.on_event("shutdown")
+async def _close_search_client():
+    await close_async_client()
+
 @app.post("/api/run", response_model=RunResponse)
-def run_query(req: RunRequest):
+async def run_query(req: RunRequest):
     """Execute a query using the Strands agent with multi-step reasoning."""
     
     start_time = time.time()
     
     try:
+        # Prefetch hits on the event loop; the agent's code_search step then
+        # reads them from the shared result cache instead of blocking on I/O.
+        # The profiled search stores its hits there too, so it is the prefetch.
+        profile = None
+        if (req.opts or {}).get("profile"):
+            _, profile = await async_search_profiled(req.query, SEARCH_OPTS)
+        else:
+            await async_search(req.query, SEARCH_OPTS)
+        
         # Initialize agent
         agent = AnswerAgent()
         
-        # Execute the plan
-        result_message = agent.run(plan, req.query)
+        # Execute the plan (synchronous Strands plan, kept off the event loop)
+        result_message = await run_in_threadpool(agent.run, plan, req.query)
         
         # Extract information from agent execution
         final_answer = result_message.content if result_message else "No answer generated"
@@ -69,6 +95,8 @@ def run_query(req: RunRequest):
             "evidence_sufficient": metadata.get("evidence_sufficient", True),
             "execution_time_ms": int((time.time() - start_time) * 1000)
         }
+        if profile is not None:
+            raw_state["profile"] = profile
         
         return RunResponse(
             final_answer=final_answer,
@@ -108,12 +136,14 @@ def build_citations(metadata: Dict[str, Any]) -> List[CitationResponse]:
             citation_type = "doc"
         
         # Get content preview
-        content = hit.get("text", "")
+        content = " ... ".join(hit.get("highlights") or []) or hit.get("text", "")
         preview = content[:150] + "..." if len(content) > 150 else content
         
+        start = hit.get("start_line") or 1
         citations.append(CitationResponse(
             type=citation_type,
             path=path,
+            lines=[start, hit.get("end_line") or start],
             repo=hit.get("repo", ""),
             sha=hit.get("sha", ""),
             content_preview=preview
@@ -172,7 +202,7 @@ def build_step_trace(agent: AnswerAgent) -> List[StepResponse]:
     return steps
 
 @app.get("/api/health")
-def health_check():
+async def health_check():
     """Health check endpoint."""
     return {"status": "healthy", "service": "legacy-codebase-assistant"}
 
@@ -15,6 +15,32 @@
             }
         )
     
+    @step
+    def search_codebase_batched(self, m: Message) -> Message:
+        """
+        Search code for every extracted term, plus documentation and CORBA
+        interfaces when relevant, in a single _msearch round trip.
+        """
+        query = m.metadata.get("original_query", "")
+        
+        evidence = self.gather_search_evidence(
+            query,
+            m.metadata,
+            include_jars=False,  # search_jars_if_needed owns JAR and business-rule lookups
+            include_corba=self.needs_corba(query)
+        )
+        code_hits = self.rank_results(evidence.pop("code_hits"), m.metadata)
+        
+        return Message(
+            role="assistant",
+            content=f"Found {len(code_hits)} code matches",
+            metadata={
+                **m.metadata,
+                **evidence,
+                "code_hits": code_hits
+            }
+        )
+    
     @step
     def search_documentation(self, m: Message) -> Message:
         """
@@ -22,8 +48,10 @@
         """
         query = m.metadata.get("original_query", "")
         
-        # Search documentation
-        doc_results = self.search_docs_semantic(query)
+        # Reuse results batched by search_codebase_batched when present
+        doc_results = m.metadata.get("doc_results")
+        if doc_results is None:
+            doc_results = self.search_docs_semantic(query)
         
         # Extract relevant sections
         relevant_sections = []
@@ -52,15 +80,17 @@
         """
         query = m.metadata.get("original_query", "")
         
-        if not any(word in query.lower() for word in ["service", "interface", "corba", "remote"]):
+        if not self.needs_corba(query):
             return Message(
                 role="assistant",
                 content="CORBA check not needed",
                 metadata=m.metadata
             )
         
-        # Search CORBA interfaces
-        corba_results = self.search_corba_interfaces(query)
+        # Reuse results batched by search_codebase_batched when present
+        corba_results = m.metadata.get("corba_results")
+        if corba_results is None:
+            corba_results = self.search_corba_interfaces(query)
         
         return Message(
             role="assistant",
@@ -184,7 +214,7 @@ Return in JSON format."""
         if "bedrock_sql_query" in suggested_tools and "database" in query_type:
             plan.append("query_database_smart")
         
-        plan.append("search_codebase_enhanced")
+        plan.append("search_codebase_batched")
         
         if "business_logic" in query_type:
             plan.append("search_jars_if_needed")
@@ -199,11 +229,13 @@ Return in JSON format."""
         
         return plan
     
-    def search_with_context(self, term: str, analysis: Dict) -> List[Dict]:
+    def needs_corba(self, query: str) -> bool:
+        return any(word in query.lower() for word in ["service", "interface", "corba", "remote"])
+    
+    def build_context_query(self, term: str, analysis: Dict) -> Dict:
         """
-        Search with codebase-specific context.
+        Build the boosted OpenSearch query for one search term.
         """
-        # Build OpenSearch query with boosts
         query = {
             "query": {
                 "bool": {
@@ -233,31 +265,10 @@ Return in JSON format."""
                 "match": {"annotations": {"query": "Controller", "boost": 2}}
             })
         
-        try:
-            results = self.os_client.search(
-                index="legacy_code,legacy_jars",
-                body=query
-            )
-            
-            hits = []
-            for hit in results['hits']['hits']:
-                hits.append({
-                    "id": hit['_id'],
-                    "score": hit['_score'],
-                    **hit['_source']
-                })
-            
-            return hits
-            
-        except Exception as e:
-            print(f"Search error: {e}")
-            return []
+        return query
     
-    def search_jar_contents(self, query: str) -> List[Dict]:
-        """
-        Search indexed JAR contents.
-        """
-        query_body = {
+    def build_jar_query(self, query: str) -> Dict:
+        return {
             "query": {
                 "multi_match": {
                     "query": query,
@@ -267,24 +278,9 @@ Return in JSON format."""
             },
             "size": 10
         }
-        
-        try:
-            results = self.os_client.search(
-                index="legacy_jars",
-                body=query_body
-            )
-            
-            return [hit['_source'] for hit in results['hits']['hits']]
-            
-        except Exception as e:
-            print(f"JAR search error: {e}")
-            return []
     
-    def search_docs_semantic(self, query: str) -> List[Dict]:
-        """
-        Semantic search in documentation.
-        """
-        query_body = {
+    def build_docs_query(self, query: str) -> Dict:
+        return {
             "query": {
                 "multi_match": {
                     "query": query,
@@ -294,24 +290,9 @@ Return in JSON format."""
             },
             "size": 10
         }
-        
-        try:
-            results = self.os_client.search(
-                index="legacy_documentation",
-                body=query_body
-            )
-            
-            return [hit['_source'] for hit in results['hits']['hits']]
-            
-        except Exception as e:
-            print(f"Documentation search error: {e}")
-            return []
     
-    def search_corba_interfaces(self, query: str) -> List[Dict]:
-        """
-        Search CORBA interfaces.
-        """
-        query_body = {
+    def build_corba_query(self, query: str) -> Dict:
+        return {
             "query": {
                 "multi_match": {
                     "query": query,
@@ -321,18 +302,110 @@ Return in JSON format."""
             },
             "size": 10
         }
+    
+    def multi_search(self, searches: List) -> List[List[Dict]]:
+        """
+        Run (index, body) searches as one _msearch round trip.
+        
+        Results come back in request order. Each hit is its _source plus
+        the document `id` and `score`. A failing sub-query yields an empty
+        list for its slot and does not affect the others.
+        """
+        if not searches:
+            return []
+        
+        lines = []
+        for index, body in searches:
+            lines.append({"index": index, "ignore_unavailable": True})
+            lines.append(body)
         
         try:
-            results = self.os_client.search(
-                index="legacy_corba",
-                body=query_body
-            )
-            
-            return [hit['_source'] for hit in results['hits']['hits']]
-            
+            results = self.os_client.msearch(body=lines)
         except Exception as e:
-            print(f"CORBA search error: {e}")
-            return []
+            print(f"Multi-search error: {e}")
+            return [[] for _ in searches]
+        
+        out = []
+        for (index, _), resp in zip(searches, results.get("responses", [])):
+            if "error" in resp:
+                print(f"Search error ({index}): {resp['error']}")
+                out.append([])
+                continue
+            out.append([
+                {"id": hit['_id'], "score": hit['_score'], **hit['_source']}
+                for hit in resp.get('hits', {}).get('hits', [])
+            ])
+        return out
+    
+    def search_with_context(self, term: str, analysis: Dict) -> List[Dict]:
+        """
+        Search with codebase-specific context.
+        """
+        return self.multi_search([
+            ("legacy_code,legacy_jars", self.build_context_query(term, analysis))
+        ])[0]
+    
+    def merge_term_hits(self, results: List[List[Dict]]) -> List[Dict]:
+        """
+        Merge per-term hit lists by document id, keeping the best score.
+        """
+        merged = {}
+        for hits in results:
+            for hit in hits:
+                seen = merged.get(hit["id"])
+                if seen is None or hit["score"] > seen["score"]:
+                    merged[hit["id"]] = hit
+        
+        return sorted(merged.values(), key=lambda h: h["score"], reverse=True)
+    
+    def gather_search_evidence(self, query: str, analysis: Dict,
+                               include_jars: bool = True,
+                               include_docs: bool = True,
+                               include_corba: bool = False) -> Dict[str, List[Dict]]:
+        """
+        Fan out the per-term code searches plus the JAR, documentation and
+        CORBA lookups in one _msearch request. Code hits are merged across
+        terms by document id, keeping the best score.
+        """
+        terms = self.extract_search_terms(query)
+        searches = [
+            ("legacy_code,legacy_jars", self.build_context_query(term, analysis))
+            for term in terms
+        ]
+        extras = []
+        if include_jars:
+            extras.append(("jar_results", "legacy_jars", self.build_jar_query(query)))
+        if include_docs:
+            extras.append(("doc_results", "legacy_documentation", self.build_docs_query(query)))
+        if include_corba:
+            extras.append(("corba_results", "legacy_corba", self.build_corba_query(query)))
+        searches.extend((index, body) for _, index, body in extras)
+        
+        results = self.multi_search(searches)
+        term_results, extra_results = results[:len(terms)], results[len(terms):]
+        
+        evidence = {"code_hits": self.merge_term_hits(term_results)}
+        for (key, _, _), hits in zip(extras, extra_results):
+            evidence[key] = hits
+        return evidence
+    
+    def search_jar_contents(self, query: str) -> List[Dict]:
+        """
+        Search indexed JAR contents. Hits are _source plus `id` and `score`.
+        """
+        return self.multi_search([("legacy_jars", self.build_jar_query(query))])[0]
+    
+    def search_docs_semantic(self, query: str) -> List[Dict]:
+        """
+        Semantic search in documentation. Hits are _source plus `id` and `score`.
+        """
+        return self.multi_search([("legacy_documentation", self.build_docs_query(query))])[0]
+    
+    def search_corba_interfaces(self, query: str) -> List[Dict]:
+        """
+        Search CORBA interfaces. Hits are _source plus `id` and `score`.
+        """
+        return self.multi_search([("legacy_corba", self.build_corba_query(query))])[0]
     
     def rank_results(self, hits: List[Dict], analysis: Dict) -> List[Dict]:
         """
@@ -530,7 +603,7 @@ Format the answer for a developer who needs actionable information."""
 # Create the enhanced plan
 enhanced_plan = Plan()\
     .add("analyze_and_optimize_query")\
-    .add("search_codebase_enhanced")\
+    .add("search_codebase_batched")\
     .add("search_jars_if_needed")\
     .add("query_database_smart")\
     .add("search_documentation")\
@@ -83,7 +83,7 @@ async def run_query(request: Query):
         # Run each step
         steps = [
             "analyze_and_optimize_query",
-            "search_codebase_enhanced",
+            "search_codebase_batched",
             "search_jars_if_needed",
             "query_database_smart",
             "search_documentation",
@@ -17,7 +17,7 @@ def score(resp, expects):
 
     # citations check
     cits_ok = True
-    pool = [resp.get("final_answer","").lower()] + [ (h.get("text","") or "").lower() for h in resp.get("raw_state",{}).get("hits",[]) ]
+    pool = [resp.get("final_answer","").lower()] + [ (h.get("text","") or " ".join(h.get("highlights") or [])).lower() for h in resp.get("raw_state",{}).get("hits",[]) ]
     for rule in (expects or {}).get("citations", []):
         want = rule.get("type","code")
         ok_type = any((c.get("type")==want) or (want=="sql_or_code" and c.get("type") in ("sql","code")) for c in resp.get("citations",[]))
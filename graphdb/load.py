@@ -1,44 +1,236 @@
 import os
-from typing import Dict, Any, Iterable
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterator, List, Tuple
 from opensearchpy import OpenSearch, RequestsHttpConnection
 from neo4j import GraphDatabase
+from indexers.webpaths import web_path
+from graphdb.schema import ensure_schema
 
 OS_INDEX = os.getenv("OS_INDEX","traceit_docs")
 OS_URL = os.getenv("OPENSEARCH_URL","http://opensearch:9200")
 N4J_URL = os.getenv("NEO4J_URL","bolt://neo4j:7687")
 N4J_USER = os.getenv("NEO4J_USER","neo4j")
 N4J_PASS = os.getenv("NEO4J_PASS","test")
+# rows per UNWIND statement / transaction
+GRAPH_BATCH_SIZE = int(os.getenv("GRAPH_BATCH_SIZE","2000"))
+# how long the driver keeps retrying a transaction that hit a transient error
+GRAPH_RETRY_SECONDS = float(os.getenv("GRAPH_RETRY_SECONDS","30"))
+
+# parallel PIT slices, each with its own Neo4j session; hits per search_after page
+GRAPH_SLICES = int(os.getenv("GRAPH_SLICES","4"))
+GRAPH_PAGE_SIZE = int(os.getenv("GRAPH_PAGE_SIZE","2000"))
+PIT_KEEP_ALIVE = "5m"
 
 client = OpenSearch(hosts=[OS_URL], use_ssl=False, verify_certs=False, connection_class=RequestsHttpConnection)
-driver = GraphDatabase.driver(N4J_URL, auth=(N4J_USER,N4J_PASS))
+driver = GraphDatabase.driver(N4J_URL, auth=(N4J_USER,N4J_PASS), max_transaction_retry_time=GRAPH_RETRY_SECONDS)
+
+# Node labels are the ones tools/graph_tool.py queries: Action, JSP, File, Class,
+# TilesDefinition, Column and the db_oracle kinds (Table, View, Procedure, ...).
+# edge target id prefix -> node label; relationship types come from the indexers
+# or are derived here (HANDLED_BY, DECLARED_IN, COLUMN_OF)
+EDGE_LABELS = {"jsp": "JSP", "tiles": "TilesDefinition", "struts": "Action",
+               "code": "File", "class": "Class", "column": "Column",
+               "dbtable": "Table", "view": "View", "proc": "Procedure",
+               "pkg": "Package", "pkgbody": "Package", "type": "Type", "typebody": "Type"}
+EDGE_TYPES = {"FORWARDS_TO", "INCLUDES", "INSERTS", "USES_TEMPLATE", "EXTENDS",
+              "READS", "WRITES", "DEPENDS_ON", "HANDLED_BY", "DECLARED_IN", "COLUMN_OF"}
+# db_oracle doc kinds loaded as nodes named OWNER.NAME
+DB_KINDS = {"Table", "View", "Procedure", "Trigger", "Package", "Type"}
+# java_parser symbol kinds that declare a type
+TYPE_KINDS = {"class", "interface", "enum", "record", "@interface"}
+
+# node label -> per-row MERGE; rows carry id plus the properties used here
+NODE_MERGES = {
+    "File": "MERGE (n:File {id:r.id}) SET n.path=r.path, n.repo=r.repo",
+    "Class": "MERGE (n:Class {id:r.id}) SET n.name=r.name, n.path=r.path, n.repo=r.repo",
+    "Action": "MERGE (n:Action {id:r.id}) SET n.name=r.name, n.path=r.path, n.repo=r.repo, n.class=r.class",
+    "JSP": "MERGE (n:JSP {id:r.id}) SET n.path=r.path, n.web_path=r.web_path, n.repo=r.repo",
+    "TilesDefinition": "MERGE (n:TilesDefinition {id:r.id}) SET n.name=r.path, n.template=r.template, n.repo=r.repo",
+    "Column": "MERGE (n:Column {id:r.id}) SET n.name=r.name, n.type=r.type, n.table=r.table",
+    **{k: f"MERGE (n:{k} {{id:r.id}}) SET n.name=r.path, n.path=r.path" for k in DB_KINDS},
+}
+
+# doc kinds that become nodes, and the source fields read from them
+LOAD_KINDS = ["Code", "StrutsAction", "JSPView", "TilesDefinition", *sorted(DB_KINDS)]
+LOAD_FIELDS = ["id", "kind", "repo", "path", "parent", "action_name", "action_class",
+               "template", "symbol", "symbol_kind", "columns", "chunk_no", "edges"]
+
+def _write_rows(tx, cypher: str, rows):
+    tx.run(cypher, rows=rows).consume()
+
+class GraphWriter:
+    """Buffers node and edge rows per statement and writes each full buffer
+    with one UNWIND in a managed write transaction.
+
+    The driver retries transient errors (deadlocks, leader switches) for up
+    to GRAPH_RETRY_SECONDS. Node buffers are flushed before any edge buffer
+    so an edge always finds its source node.
+    """
+
+    def __init__(self, sess, batch_size: int = GRAPH_BATCH_SIZE):
+        self.sess = sess
+        self.batch_size = batch_size
+        self.nodes: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self.edges: Dict[Tuple[str, str, str], List[Dict[str, Any]]] = defaultdict(list)
+        self.node_count = 0
+        self.edge_count = 0
+        self.batches = 0
+
+    def node(self, label: str, row: Dict[str, Any]):
+        self.nodes[label].append(row)
+        if len(self.nodes[label]) >= self.batch_size:
+            self._flush_nodes(label)
 
-def _scroll(index: str):
-    page = client.search(index=index, size=500, query={"match_all": {}}, scroll="2m")
-    sid = page.get("_scroll_id")
-    hits = page["hits"]["hits"]
-    while hits:
+    def edges_of(self, label: str, node_id: str, edges):
+        """Queue index-time resolved edges of one node."""
+        for e in edges or []:
+            target_label = EDGE_LABELS.get(e["target"].split(":", 1)[0])
+            if not (target_label and e["type"] in EDGE_TYPES):
+                continue
+            key = (label, e["type"], target_label)
+            parts = e["target"].split(":", 2)
+            # targets not indexed themselves (yet) still get path, repo, name and web path;
+            # the name is the path's last segment (OWNER.NAME for db objects)
+            self.edges[key].append({"source": node_id, "target": e["target"], "path": e.get("path"),
+                                    "repo": parts[1] if len(parts) == 3 else None,
+                                    "target_name": (e.get("path") or "").rsplit("/", 1)[-1] or None,
+                                    "web_path": web_path(e["path"]) if target_label == "JSP" and e.get("path") else None,
+                                    "name": e.get("name"), "via": e.get("via")})
+            if len(self.edges[key]) >= self.batch_size:
+                for node_label in list(self.nodes):
+                    self._flush_nodes(node_label)
+                self._flush_edges(key)
+
+    def _write(self, cypher: str, rows: List[Dict[str, Any]]):
+        self.sess.execute_write(_write_rows, cypher, rows)
+        self.batches += 1
+
+    def _flush_nodes(self, label: str):
+        rows, self.nodes[label] = self.nodes[label], []
+        if rows:
+            self._write(f"UNWIND $rows AS r {NODE_MERGES[label]}", rows)
+            self.node_count += len(rows)
+
+    def _flush_edges(self, key: Tuple[str, str, str]):
+        rows, self.edges[key] = self.edges[key], []
+        if not rows:
+            return
+        label, rel, target_label = key
+        self._write(f"UNWIND $rows AS r "
+                    f"MATCH (s:{label} {{id:r.source}}) "
+                    f"MERGE (t:{target_label} {{id:r.target}}) "
+                    f"ON CREATE SET t.path=r.path, t.repo=r.repo, t.web_path=r.web_path "
+                    f"SET t.name=coalesce(t.name, r.target_name) "
+                    f"MERGE (s)-[e:{rel}]->(t) SET e.name=r.name, e.via=r.via", rows)
+        self.edge_count += len(rows)
+
+    def flush(self):
+        for label in list(self.nodes):
+            self._flush_nodes(label)
+        for key in list(self.edges):
+            self._flush_edges(key)
+
+def _add_hit(writer: GraphWriter, src: Dict[str, Any]):
+    kind = src.get("kind")
+    doc_id = src.get("id")
+    repo = src.get("repo")
+    path = src.get("path")
+    if kind == "Code":
+        # all docs of a source file share its parent id
+        file_id = src.get("parent") or doc_id
+        writer.node("File", {"id": file_id, "path": path, "repo": repo})
+        if src.get("symbol_kind") in TYPE_KINDS and src.get("symbol"):
+            class_id = f"class:{repo}:{src['symbol']}"
+            writer.node("Class", {"id": class_id, "name": src["symbol"], "path": path, "repo": repo})
+            writer.edges_of("Class", class_id, [{"type": "DECLARED_IN", "target": file_id, "path": path}])
+    elif kind == "StrutsAction":
+        action_class = src.get("action_class")
+        writer.node("Action", {"id": doc_id, "name": src.get("action_name") or path, "path": path,
+                               "repo": repo, "class": action_class})
+        edges = list(src.get("edges") or [])
+        if action_class:
+            edges.append({"type": "HANDLED_BY", "target": f"class:{repo}:{action_class}", "path": action_class})
+        writer.edges_of("Action", doc_id, edges)
+    elif kind == "JSPView":
+        # chunks of one JSP share its parent id; only chunk 0 has edges
+        node_id = src.get("parent") or doc_id
+        writer.node("JSP", {"id": node_id, "path": path, "web_path": web_path(path), "repo": repo})
+        writer.edges_of("JSP", node_id, src.get("edges"))
+    elif kind == "TilesDefinition":
+        writer.node("TilesDefinition", {"id": doc_id, "path": path, "template": src.get("template"), "repo": repo})
+        writer.edges_of("TilesDefinition", doc_id, src.get("edges"))
+    elif kind in DB_KINDS:
+        # chunks of one PL/SQL unit share its parent id; only chunk 0 has edges
+        node_id = src.get("parent") or doc_id
+        writer.node(kind, {"id": node_id, "path": path})
+        writer.edges_of(kind, node_id, src.get("edges"))
+        if src.get("chunk_no", 0) == 0:
+            for c in src.get("columns") or []:
+                column_id = f"column:{path}.{c['name']}"
+                writer.node("Column", {"id": column_id, "name": c["name"], "type": c.get("type"), "table": path})
+                writer.edges_of("Column", column_id, [{"type": "COLUMN_OF", "target": node_id, "path": path}])
+
+def _export(pit_id: str, slice_id: int, slices: int) -> Iterator[Dict[str, Any]]:
+    """One PIT slice of the loaded kinds, paged with search_after on the unique id."""
+    after = None
+    while True:
+        body = {
+            "size": GRAPH_PAGE_SIZE,
+            "pit": {"id": pit_id, "keep_alive": PIT_KEEP_ALIVE},
+            # method bodies add nothing to the graph that their type doc lacks
+            "query": {"bool": {"filter": [{"terms": {"kind": LOAD_KINDS}}],
+                               "must_not": [{"terms": {"symbol_kind": ["method", "constructor"]}}]}},
+            "_source": LOAD_FIELDS,
+            "sort": [{"id": "asc"}],
+        }
+        if slices > 1:
+            body["slice"] = {"id": slice_id, "max": slices}
+        if after:
+            body["search_after"] = after
+        page = client.search(body=body)
+        pit_id = page.get("pit_id", pit_id)
+        hits = page["hits"]["hits"]
         for h in hits:
-            yield h
-        page = client.scroll(scroll_id=sid, scroll="2m")
-        sid = page.get("_scroll_id"); hits = page["hits"]["hits"]
+            yield h.get("_source", {})
+        if len(hits) < GRAPH_PAGE_SIZE:
+            return
+        after = hits[-1]["sort"]
 
-def load():
+def _load_slice(pit_id: str, slice_id: int, slices: int, batch_size: int) -> GraphWriter:
     with driver.session() as sess:
-        for h in _scroll(OS_INDEX):
-            src = h.get("_source",{})
-            kind = src.get("kind")
-            doc_id = src.get("id")
-            path = src.get("path")
-            if kind == "Code":
-                sess.run("MERGE (f:File {id:$id}) SET f.path=$path, f.repo=$repo",
-                         id=f"file:{path}", path=path, repo=src.get("repo"))
-            if kind == "StrutsAction":
-                sess.run("MERGE (s:StrutsAction {id:$id}) SET s.name=$name, s.path=$path",
-                         id=doc_id, name=src.get("action_name") or path, path=path)
-            if kind == "JSPView":
-                sess.run("MERGE (v:JSPView {id:$id}) SET v.path=$path",
-                         id=doc_id, path=path)
-    print("[graphdb.load] Neo4j load complete")
+        writer = GraphWriter(sess, batch_size)
+        for src in _export(pit_id, slice_id, slices):
+            _add_hit(writer, src)
+        writer.flush()
+    return writer
+
+def load(slices: int = GRAPH_SLICES, batch_size: int = GRAPH_BATCH_SIZE):
+    """Export the index through a point-in-time in parallel slices into Neo4j.
+
+    Only the fields the loader reads are fetched (never `text`). Slices run
+    concurrently, each with its own session and writer; the PIT is deleted
+    even if a slice fails.
+    """
+    # every MERGE below is an index lookup only once the id constraints exist
+    ensure_schema(driver)
+    pit_id = client.create_pit(index=OS_INDEX, params={"keep_alive": PIT_KEEP_ALIVE})["pit_id"]
+    try:
+        with ThreadPoolExecutor(max_workers=slices) as ex:
+            writers = list(ex.map(lambda i: _load_slice(pit_id, i, slices, batch_size), range(slices)))
+    finally:
+        try:
+            client.delete_pit(body={"pit_id": [pit_id]})
+        except Exception as e:
+            print(f"[graphdb.load] could not delete PIT: {e}")
+    print(f"[graphdb.load] Neo4j load complete: {sum(w.node_count for w in writers)} node rows, "
+          f"{sum(w.edge_count for w in writers)} edge rows in {sum(w.batches for w in writers)} "
+          f"transactions over {slices} slices")
 
 if __name__ == "__main__":
-    load()
+    import argparse
+    p = argparse.ArgumentParser()
+    p.add_argument("--slices", type=int, default=GRAPH_SLICES)
+    p.add_argument("--batch-size", type=int, default=GRAPH_BATCH_SIZE)
+    a = p.parse_args()
+    load(slices=a.slices, batch_size=a.batch_size)
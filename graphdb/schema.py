@@ -0,0 +1,97 @@
+import os
+from typing import Dict, List, Tuple
+from neo4j import GraphDatabase
+
+N4J_URL = os.getenv("NEO4J_URL","bolt://neo4j:7687")
+N4J_USER = os.getenv("NEO4J_USER","neo4j")
+N4J_PASS = os.getenv("NEO4J_PASS","test")
+
+# bump when CONSTRAINTS/INDEXES/OBSOLETE change; stored on a :TraceitSchema node
+# (0 = the unversioned setup_mvp.py / schema.cql era)
+SCHEMA_VERSION = 1
+
+# every label graphdb.load MERGEs on id
+NODE_LABELS = ["Action", "JSP", "File", "Class", "TilesDefinition", "Column",
+               "Table", "View", "Procedure", "Trigger", "Package", "Type"]
+CONSTRAINTS = [(f"uniq_{label.lower()}_id", label, "id") for label in NODE_LABELS]
+# (name, kind, label, property) for what tools/graph_tool.py matches on;
+# text indexes serve its ENDS WITH lookups
+INDEXES = [
+    ("idx_action_name", "RANGE", "Action", "name"),
+    ("idx_action_path", "RANGE", "Action", "path"),
+    ("idx_jsp_path", "RANGE", "JSP", "path"),
+    ("idx_jsp_web_path", "RANGE", "JSP", "web_path"),
+    ("idx_jsp_path_text", "TEXT", "JSP", "path"),
+    ("idx_file_path", "RANGE", "File", "path"),
+    ("idx_class_name", "RANGE", "Class", "name"),
+    ("idx_table_name", "RANGE", "Table", "name"),
+    ("idx_table_name_text", "TEXT", "Table", "name"),
+    ("idx_view_name", "RANGE", "View", "name"),
+    ("idx_view_name_text", "TEXT", "View", "name"),
+    ("idx_procedure_name", "RANGE", "Procedure", "name"),
+    ("idx_trigger_name", "RANGE", "Trigger", "name"),
+    ("idx_package_name", "RANGE", "Package", "name"),
+]
+# setup_mvp's former unique Action.name / JSP.path / File.path constraints: an
+# action name or JSP path repeats across repos and refs
+OBSOLETE = ["CONSTRAINT action_name", "CONSTRAINT jsp_path", "CONSTRAINT file_path"]
+
+def statements() -> List[str]:
+    """Idempotent DDL for the current schema version."""
+    out = [f"CREATE CONSTRAINT {name} IF NOT EXISTS FOR (n:{label}) REQUIRE n.{prop} IS UNIQUE"
+           for name, label, prop in CONSTRAINTS]
+    out += [f"CREATE {kind} INDEX {name} IF NOT EXISTS FOR (n:{label}) ON (n.{prop})"
+            for name, kind, label, prop in INDEXES]
+    return out
+
+def missing(sess) -> List[str]:
+    """Expected constraints/indexes that are absent or not ONLINE."""
+    found: Dict[Tuple[str, str, str], str] = {}
+    for r in sess.run("SHOW INDEXES YIELD type, labelsOrTypes, properties, state"):
+        if r["labelsOrTypes"] and r["properties"] and len(r["properties"]) == 1:
+            found[(r["type"], r["labelsOrTypes"][0], r["properties"][0])] = r["state"]
+    expected = [("RANGE", label, prop, f"constraint {name}") for name, label, prop in CONSTRAINTS]
+    expected += [(kind, label, prop, f"index {name}") for name, kind, label, prop in INDEXES]
+    out = []
+    for kind, label, prop, what in expected:
+        state = found.get((kind, label, prop))
+        if state != "ONLINE":
+            out.append(f"{what} on :{label}({prop}) {'missing' if state is None else state}")
+    return out
+
+def ensure_schema(driver=None) -> List[str]:
+    """Bring the graph schema to SCHEMA_VERSION; return what is still missing.
+
+    Safe to run at every startup: DDL is only issued when the stored version
+    is older, and the check is a single SHOW INDEXES.
+    """
+    own = driver is None
+    driver = driver or GraphDatabase.driver(N4J_URL, auth=(N4J_USER,N4J_PASS))
+    try:
+        with driver.session() as sess:
+            rec = sess.run("MATCH (s:TraceitSchema {id:'graph'}) RETURN s.version AS v").single()
+            current = rec["v"] if rec else 0
+            if current < SCHEMA_VERSION:
+                for name in OBSOLETE:
+                    sess.run(f"DROP {name} IF EXISTS").consume()
+                for stmt in statements():
+                    sess.run(stmt).consume()
+                sess.run("MERGE (s:TraceitSchema {id:'graph'}) SET s.version=$v", v=SCHEMA_VERSION).consume()
+                print(f"[graphdb.schema] upgraded schema v{current} -> v{SCHEMA_VERSION}")
+            gaps = missing(sess)
+    finally:
+        if own:
+            driver.close()
+    for gap in gaps:
+        print(f"[graphdb.schema] {gap}")
+    return gaps
+
+if __name__ == "__main__":
+    import argparse
+    p = argparse.ArgumentParser()
+    p.add_argument("--print", action="store_true", help="print the DDL instead of applying it")
+    a = p.parse_args()
+    if a.print:
+        print(";\n".join(statements()) + ";")
+    else:
+        ensure_schema()
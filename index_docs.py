@@ -6,7 +6,8 @@ This script should be run to add documentation beyond code.
 
 import os
 import glob
-from retrievers.pipeline import upsert
+from retrievers.pipeline import upsert, bulk_writer, delete_prefix
+from indexers.chunker import chunk_doc
 from pathlib import Path
 
 def index_documentation(docs_path: str):
@@ -26,40 +27,48 @@ def index_documentation(docs_path: str):
     
     doc_count = 0
     
-    for pattern in doc_patterns:
-        for file_path in glob.glob(os.path.join(docs_path, "**", pattern), recursive=True):
-            try:
-                # Read file content
-                content = read_file_content(file_path)
-                if not content:
-                    continue
+    with bulk_writer() as sink:
+        for pattern in doc_patterns:
+            for file_path in glob.glob(os.path.join(docs_path, "**", pattern), recursive=True):
+                try:
+                    # Read file content
+                    content = read_file_content(file_path)
+                    if not content:
+                        continue
                 
-                # Generate document ID
-                rel_path = os.path.relpath(file_path, docs_path)
-                doc_id = f"doc_{rel_path.replace(os.sep, '_').replace('.', '_')}"
+                    # Generate document ID
+                    rel_path = os.path.relpath(file_path, docs_path)
+                    doc_id = f"doc_{rel_path.replace(os.sep, '_').replace('.', '_')}"
                 
-                # Extract keywords/anchors from filename and content
-                anchors = extract_anchors(file_path, content)
+                    # Extract keywords/anchors from filename and content
+                    anchors = extract_anchors(file_path, content)
                 
-                # Create document
-                doc = {
-                    "id": doc_id,
-                    "kind": "documentation",
-                    "repo": "documentation",
-                    "path": rel_path,
-                    "sha": "latest",
-                    "source_env": "legacy",
-                    "anchors": anchors,
-                    "text": content
-                }
+                    # Create document
+                    doc = {
+                        "id": doc_id,
+                        "kind": "documentation",
+                        "repo": "documentation",
+                        "path": rel_path,
+                        "sha": "latest",
+                        "source_env": "legacy",
+                        "anchors": anchors,
+                        "text": content
+                    }
                 
-                upsert(doc)
-                doc_count += 1
-                print(f"  Indexed: {rel_path}")
+                    # drop the previous run's chunks: a shorter file, or one that now
+                    # fits in a single window, would otherwise leave stale ids behind
+                    chunks = chunk_doc(doc)
+                    delete_prefix(f"{doc_id}~")
+                    if chunks[0]["id"] != doc_id:
+                        sink.delete(doc_id)
+                    sink.extend(chunks)
+                    doc_count += 1
+                    print(f"  Indexed: {rel_path}")
                 
-            except Exception as e:
-                print(f"  Error indexing {file_path}: {e}")
+                except Exception as e:
+                    print(f"  Error indexing {file_path}: {e}")
     
+    sink.report("index_docs")
     print(f"Indexed {doc_count} documentation files")
 
 def read_file_content(file_path: str) -> str:
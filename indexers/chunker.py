@@ -0,0 +1,50 @@
+import os
+from typing import Dict, Any, List, Optional, Tuple
+
+CHUNK_MAX_LINES = int(os.getenv("CHUNK_MAX_LINES", "120"))
+CHUNK_MAX_CHARS = int(os.getenv("CHUNK_MAX_CHARS", "6000"))
+CHUNK_OVERLAP_LINES = int(os.getenv("CHUNK_OVERLAP_LINES", "20"))
+
+def windows(text: str, max_lines: int = CHUNK_MAX_LINES, max_chars: int = CHUNK_MAX_CHARS,
+            overlap: int = CHUNK_OVERLAP_LINES) -> List[Tuple[int, int, str]]:
+    """Split text into overlapping (start_line, end_line, text) windows.
+
+    Windows end on line boundaries and hold at most `max_lines` lines and
+    about `max_chars` characters; consecutive windows share `overlap` lines.
+    Lines longer than `max_chars` (minified files) are cut into pieces that
+    keep their line number.
+    """
+    segs: List[Tuple[int, str]] = []
+    for no, line in enumerate(text.split("\n"), 1):
+        for k in range(0, max(len(line), 1), max_chars):
+            segs.append((no, line[k:k + max_chars]))
+    out = []
+    i, n = 0, len(segs)
+    while i < n:
+        j, size = i, 0
+        while j < n and j - i < max_lines and (j == i or size + len(segs[j][1]) < max_chars):
+            size += len(segs[j][1]) + 1
+            j += 1
+        out.append((segs[i][0], segs[j - 1][0], "\n".join(s for _, s in segs[i:j])))
+        if j >= n:
+            break
+        # never overlap more than half a window, so dense windows still advance
+        i = j - min(overlap, (j - i) // 2)
+    return out
+
+def chunk_doc(doc: Dict[str, Any], first_line: int = 1, parent: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Split a doc's text into chunk docs that share a `parent` id.
+
+    A doc that fits in one window keeps its id; otherwise chunks get ids
+    `<id>~<chunk_no>`. start_line/end_line are absolute, counted from
+    `first_line`. `parent` defaults to the doc's own id; search collapses
+    hits on it.
+    """
+    parent = parent or doc.get("parent") or doc["id"]
+    wins = windows(doc.get("text") or "")
+    if len(wins) <= 1:
+        end = first_line + (wins[0][1] - 1 if wins else 0)
+        return [{"start_line": first_line, "end_line": end, **doc, "parent": parent, "chunk_no": 0}]
+    return [{**doc, "id": f"{doc['id']}~{no}", "parent": parent, "chunk_no": no,
+             "start_line": first_line + start - 1, "end_line": first_line + end - 1, "text": text}
+            for no, (start, end, text) in enumerate(wins)]
@@ -1,8 +1,226 @@
-import os
+import os, re
+from collections import defaultdict
+from itertools import groupby
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 import oracledb
-from retrievers.pipeline import upsert
+from retrievers.pipeline import SEARCH_BACKEND, bulk_writer, delete_prefix, index_identity
+from .chunker import chunk_doc
+from .manifest import Manifest
+from .stages import Pipeline, Stage
 
-def run():
+# rows per round trip; the dictionary views return millions of rows on big instances
+ORACLE_ARRAYSIZE = int(os.getenv("ORACLE_ARRAYSIZE", "5000"))
+ORACLE_WORKERS = int(os.getenv("ORACLE_WORKERS", "4"))
+# comma-separated; empty harvests every owner not excluded
+ORACLE_OWNERS = [o.strip().upper() for o in os.getenv("ORACLE_OWNERS", "").split(",") if o.strip()]
+EXCLUDED_OWNERS = ("SYS", "SYSTEM", "XDB", "MDSYS", "CTXSYS", "ORDSYS", "OUTLN", "DBSNMP",
+                   "APPQOSSYS", "WMSYS", "OJVMSYS", "LBACSYS", "GSMADMIN_INTERNAL", "AUDSYS")
+# bump when the harvested doc shape changes, so unchanged objects are harvested again
+HARVEST_VERSION = 1
+
+def _cursor(conn):
+    cur = conn.cursor()
+    cur.arraysize = ORACLE_ARRAYSIZE
+    # first batch comes back with the execute round trip
+    cur.prefetchrows = ORACLE_ARRAYSIZE + 1
+    return cur
+
+def _doc(kind: str, doc_id: str, path: str, text: str, anchors: List[str], **extra) -> Dict[str, Any]:
+    return {"id": doc_id, "kind": kind, "repo": "oracle", "path": path,
+            "source_env": "legacy", "text": text, "anchors": anchors, **extra}
+
+def list_owners(conn) -> List[str]:
+    if ORACLE_OWNERS:
+        return ORACLE_OWNERS
+    cur = _cursor(conn)
+    marks = ",".join(f":{i + 1}" for i in range(len(EXCLUDED_OWNERS)))
+    cur.execute(f"SELECT DISTINCT OWNER FROM ALL_OBJECTS WHERE OWNER NOT IN ({marks}) ORDER BY OWNER",
+                EXCLUDED_OWNERS)
+    return [r[0] for r in cur]
+
+# manifest entries are "<OBJECT_TYPE>:<NAME>" -> LAST_DDL_TIME and doc ids
+# PL/SQL object type -> (id prefix, doc kind); graphdb.load maps prefixes back to labels
+PLSQL_TYPES = {"PROCEDURE": ("proc", "Procedure"), "FUNCTION": ("proc", "Procedure"),
+               "TRIGGER": ("proc", "Trigger"), "PACKAGE": ("pkg", "Package"),
+               "PACKAGE BODY": ("pkgbody", "Package"), "TYPE": ("type", "Type"),
+               "TYPE BODY": ("typebody", "Type")}
+OBJECT_TYPES = ("TABLE", "VIEW") + tuple(PLSQL_TYPES)
+ID_PREFIXES = {"TABLE": "dbtable", "VIEW": "view", **{t: p for t, (p, _) in PLSQL_TYPES.items()}}
+IN_BATCH = 500
+LEGACY_COLUMN_PREFIX = "dbcol:"
+# DML targets in PL/SQL source; the name is matched against the object's dependencies
+DML_RX = re.compile(r"\b(?:INSERT\s+INTO|UPDATE|DELETE(?:\s+FROM)?|MERGE\s+INTO)\s+(?:\"?\w+\"?\.)?\"?(\w+)", re.I)
+COMMENT_RX = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+
+def _manifest_name(owner: str) -> str:
+    return f"{SEARCH_BACKEND}-oracle-{owner}"
+
+def object_id(owner: str, name: str, typ: str) -> Optional[str]:
+    prefix = ID_PREFIXES.get(typ)
+    return f"{prefix}:{owner}.{name}" if prefix else None
+
+def list_objects(cur, owner: str) -> Dict[str, Tuple[str, str, str]]:
+    """key -> (name, type, DDL stamp) for every harvested object of an owner."""
+    marks = ",".join(f":t{i}" for i in range(len(OBJECT_TYPES)))
+    cur.execute(f"SELECT OBJECT_NAME, OBJECT_TYPE, LAST_DDL_TIME FROM ALL_OBJECTS "
+                f"WHERE OWNER = :o AND OBJECT_TYPE IN ({marks})",
+                o=owner, **{f"t{i}": t for i, t in enumerate(OBJECT_TYPES)})
+    return {f"{typ}:{name}": (name, typ, f"ddl:{ddl.isoformat() if ddl else ''}") for name, typ, ddl in cur}
+
+def _select(cur, sql: str, owner: str, column: str, names: Optional[List[str]]):
+    """Run `sql` (with a {filter} slot) for all objects, or only `names` in IN-list batches."""
+    if names is None:
+        cur.execute(sql.format(filter=""), o=owner)
+        yield from cur
+        return
+    for i in range(0, len(names), IN_BATCH):
+        batch = names[i:i + IN_BATCH]
+        binds = {f"n{k}": n for k, n in enumerate(batch)}
+        cur.execute(sql.format(filter=f"AND {column} IN ({','.join(':' + b for b in binds)})"),
+                    o=owner, **binds)
+        yield from cur
+
+def dependencies(cur, owner: str, names: Optional[List[str]]) -> Dict[str, List[Tuple[str, str, str]]]:
+    """key -> [(owner, name, type)] of the tables, views and code each object references."""
+    deps = defaultdict(list)
+    for name, typ, r_owner, r_name, r_type in _select(cur, """
+      SELECT NAME, TYPE, REFERENCED_OWNER, REFERENCED_NAME, REFERENCED_TYPE
+      FROM ALL_DEPENDENCIES WHERE OWNER = :o {filter}
+    """, owner, "NAME", names):
+        if r_owner in EXCLUDED_OWNERS or r_owner == "PUBLIC" or r_type not in ID_PREFIXES:
+            continue
+        deps[f"{typ}:{name}"].append((r_owner, r_name, r_type))
+    return deps
+
+def dependency_edges(deps: List[Tuple[str, str, str]], source: str = "") -> List[Dict[str, Any]]:
+    """READS/WRITES edges to tables and views (WRITES when the source has DML
+    against the name), DEPENDS_ON edges to other code."""
+    written = {m.upper() for m in DML_RX.findall(COMMENT_RX.sub(" ", source))}
+    edges = []
+    for r_owner, r_name, r_type in sorted(set(deps)):
+        if r_type in ("TABLE", "VIEW"):
+            rel = "WRITES" if r_name.upper() in written else "READS"
+        else:
+            rel = "DEPENDS_ON"
+        edges.append({"type": rel, "target": object_id(r_owner, r_name, r_type),
+                      "path": f"{r_owner}.{r_name}", "name": r_type})
+    return edges
+
+def _access(edges: List[Dict[str, Any]]) -> Dict[str, List[str]]:
+    return {"reads": [e["path"] for e in edges if e["type"] == "READS"],
+            "writes": [e["path"] for e in edges if e["type"] == "WRITES"]}
+
+def harvest_owner(conn, owner: str, known: Optional[Dict[str, str]] = None) -> Iterator[Tuple[str, str, Optional[List[Dict[str, Any]]]]]:
+    """Harvest one schema; objects whose DDL stamp matches `known` are skipped.
+
+    Yields (key, stamp, docs) per object as soon as it is read, so only one
+    object's source is held at a time. Unchanged objects come first with
+    docs None (the caller still needs their stamps to tell dropped objects);
+    changed ones get one doc per table and view (with its column list) and
+    one per PL/SQL unit holding its ALL_SOURCE text. Views and PL/SQL carry
+    ALL_DEPENDENCIES as edges. `known` None harvests everything.
+    """
+    cur = _cursor(conn)
+    objects = list_objects(cur, owner)
+    stamps = {key: obj[2] for key, obj in objects.items()}
+    changed = {key: obj for key, obj in objects.items() if known is None or known.get(key) != obj[2]}
+    for key in stamps.keys() - changed.keys():
+        yield key, stamps[key], None
+    if not changed:
+        cur.close()
+        return
+    full = known is None or len(changed) == len(objects)
+    done = set()
+
+    def names(*types):
+        return None if full else sorted({o[0] for o in changed.values() if o[1] in types})
+
+    def emit(key: str, doc: Dict[str, Any]):
+        done.add(key)
+        return key, stamps[key], [{**doc, "sha": stamps[key]}]
+
+    dep_names = names("VIEW", *PLSQL_TYPES)
+    deps = dependencies(cur, owner, dep_names) if dep_names is None or dep_names else {}
+
+    view_names = names("VIEW")
+    views = {}
+    if view_names is None or view_names:
+        views = {v: txt or "" for v, txt in _select(
+            cur, "SELECT VIEW_NAME, TEXT FROM ALL_VIEWS WHERE OWNER = :o {filter}", owner, "VIEW_NAME", view_names)}
+
+    def view_doc(v: str, text: str, anchors: List[str], **extra) -> Dict[str, Any]:
+        edges = dependency_edges(deps.get(f"VIEW:{v}", []))
+        return _doc("View", f"view:{owner}.{v}", f"{owner}.{v}", text,
+                    anchors + [e["path"] for e in edges], edges=edges, **_access(edges), **extra)
+
+    table_names = names("TABLE", "VIEW")
+    rows = _select(cur, """
+      SELECT TABLE_NAME, COLUMN_NAME, DATA_TYPE, DATA_LENGTH, DATA_PRECISION, DATA_SCALE, NULLABLE
+      FROM ALL_TAB_COLUMNS WHERE OWNER = :o {filter} ORDER BY TABLE_NAME, COLUMN_ID
+    """, owner, "TABLE_NAME", table_names) if table_names is None or table_names else []
+    for t, group in groupby(rows, key=lambda r: r[0]):
+        columns = []
+        for _, c, dt, length, precision, scale, nullable in group:
+            if precision is not None:
+                dt = f"{dt}({precision},{scale or 0})"
+            elif dt in ("VARCHAR2", "NVARCHAR2", "CHAR", "NCHAR", "RAW"):
+                dt = f"{dt}({length})"
+            columns.append({"name": c, "type": dt, "nullable": nullable == "Y"})
+        cols_text = "\n".join(f"  {c['name']} {c['type']}{'' if c['nullable'] else ' NOT NULL'}" for c in columns)
+        anchors = [owner, t] + [c["name"] for c in columns]
+        if f"VIEW:{t}" in changed:
+            yield emit(f"VIEW:{t}", view_doc(t, f"VIEW {owner}.{t}\n{cols_text}\nAS\n{views.pop(t, '')}",
+                                             anchors, columns=columns))
+        elif f"TABLE:{t}" in changed:
+            yield emit(f"TABLE:{t}", _doc("Table", f"dbtable:{owner}.{t}", f"{owner}.{t}",
+                                          f"TABLE {owner}.{t}\n{cols_text}", anchors, columns=columns))
+    # views whose columns are not visible to this user
+    for v, txt in views.items():
+        if f"VIEW:{v}" in changed:
+            yield emit(f"VIEW:{v}", view_doc(v, f"VIEW {owner}.{v}\nAS\n{txt}", [owner, v]))
+    views.clear()
+
+    def plsql_doc(name: str, typ: str, source: str) -> Dict[str, Any]:
+        prefix, kind = PLSQL_TYPES[typ]
+        edges = dependency_edges(deps.get(f"{typ}:{name}", []), source)
+        return _doc(kind, f"{prefix}:{owner}.{name}", f"{owner}.{name}", source,
+                    [owner, name, typ] + [e["path"] for e in edges],
+                    object_type=typ, edges=edges, **_access(edges))
+
+    # ALL_SOURCE comes back one row per line; rows stream in arraysize batches
+    # and are joined per object, which is handed on before the next is read
+    source_names = names(*PLSQL_TYPES)
+    rows = _select(cur, """
+      SELECT NAME, TYPE, TEXT FROM ALL_SOURCE WHERE OWNER = :o {filter} ORDER BY NAME, TYPE, LINE
+    """, owner, "NAME", source_names) if source_names is None or source_names else []
+    for (name, typ), group in groupby(rows, key=lambda r: (r[0], r[1])):
+        key = f"{typ}:{name}"
+        if key in changed and typ in PLSQL_TYPES:
+            # ALL_SOURCE lines keep their newline
+            yield emit(key, plsql_doc(name, typ, "".join(r[2] or "" for r in group).rstrip("\n")))
+    # objects whose columns or source this account cannot see (e.g. no EXECUTE
+    # privilege) still get a stub, so their stamp is recorded and they are not
+    # taken for dropped objects
+    for key, (name, typ, _) in changed.items():
+        if key in done:
+            continue
+        if typ in PLSQL_TYPES:
+            yield emit(key, plsql_doc(name, typ, f"{typ} {owner}.{name}"))
+        elif typ == "VIEW":
+            yield emit(key, view_doc(name, f"VIEW {owner}.{name}", [owner, name]))
+        else:
+            yield emit(key, _doc("Table", f"dbtable:{owner}.{name}", f"{owner}.{name}",
+                                 f"TABLE {owner}.{name}", [owner, name], columns=[]))
+    cur.close()
+
+def run(workers: int = ORACLE_WORKERS, full: bool = False):
+    """Sync Oracle metadata into the index.
+
+    Per-owner manifests record each object's LAST_DDL_TIME and doc ids, so
+    reruns only re-harvest objects whose DDL changed and delete the docs of
+    dropped objects (and of owners no longer present). `full` re-harvests
+    everything.
+    """
     dsn = os.getenv("ORACLE_DSN")
     user = os.getenv("ORACLE_USER")
     pw = os.getenv("ORACLE_PASS")
@@ -10,59 +228,94 @@ def run():
         print("[db_oracle] ORACLE_DSN/USER/PASS not set; skipping")
         return
 
-    conn = oracledb.connect(user=user, password=pw, dsn=dsn)  # thin mode
-    cur = conn.cursor()
+    # thin mode; one pooled session per concurrently harvested owner
+    pool = oracledb.create_pool(user=user, password=pw, dsn=dsn, min=1, max=workers, increment=1)
+    try:
+        with pool.acquire() as conn:
+            owners = list_owners(conn)
+        print(f"[db_oracle] syncing {len(owners)} owners with {workers} sessions{' (full)' if full else ''}")
+        identity = {"index": index_identity(), "harvester": HARVEST_VERSION}
+        manifests = {o: Manifest.load(_manifest_name(o), identity) for o in owners}
+        if not ORACLE_OWNERS:
+            # owners that disappeared since the last sync
+            for name in Manifest.names(f"{SEARCH_BACKEND}-oracle-"):
+                owner = name[len(f"{SEARCH_BACKEND}-oracle-"):]
+                if owner not in manifests:
+                    manifests[owner] = Manifest.load(name, identity)
+
+        # per-column docs from before table docs carried their column list; a
+        # no-op once they are gone, and a rebuild that copied them across is cleaned too
+        legacy = delete_prefix(LEGACY_COLUMN_PREFIX)
+        if legacy:
+            print(f"[db_oracle] deleted {legacy} legacy {LEGACY_COLUMN_PREFIX} column docs")
+        known = {o: None if full else {k: e.get("sha") for k, e in manifests[o].entries.items()} for o in owners}
+        # owner -> [objects, changed]
+        counts: Dict[str, List[int]] = defaultdict(lambda: [0, 0])
+
+        def harvest(owner):
+            try:
+                with pool.acquire() as conn:
+                    for key, stamp, docs in harvest_owner(conn, owner, known[owner]):
+                        yield owner, key, stamp, docs
+            except oracledb.Error as e:
+                print(f"[db_oracle] {owner}: {e}")
+                yield owner, None, None, None
+
+        removed = 0
+        with bulk_writer() as sink:
+            def ship(item):
+                owner, key, stamp, docs = item
+                manifest = manifests[owner]
+                if key is None:
+                    # keep this owner's remaining docs; it is retried on the next run
+                    manifest.seen.update(manifest.entries)
+                    return
+                manifest.unchanged_blob(key, stamp)
+                counts[owner][0] += 1
+                if docs is None:
+                    return
+                # long view texts and very wide tables are split like source files
+                chunks = []
+                for doc in docs:
+                    parts = chunk_doc(doc)
+                    # the graph needs the edges once per object, not once per chunk
+                    for part in parts[1:]:
+                        part.pop("edges", None)
+                    chunks.extend(parts)
+                for doc_id in manifest.update(key, None, stamp, [c["id"] for c in chunks]):
+                    sink.delete(doc_id)
+                sink.extend(chunks)
+                counts[owner][1] += 1
+
+            # owners are harvested in threads (the driver releases the GIL on I/O) and
+            # stream objects through a bounded queue; manifests and the bulk writer
+            # are only touched by the single sink thread since neither is thread-safe;
+            # errors other than database errors stop the sync before anything is deleted
+            pipe = Pipeline("db_oracle", [Stage("harvest", harvest, workers, fatal=True),
+                                          Stage("sink", ship, fatal=True)])
+            pipe.run(owners)
+            pipe.report()
+            for owner, (objects, changed) in sorted(counts.items()):
+                print(f"[db_oracle] {owner}: {objects} objects, {changed} changed")
+            for manifest in manifests.values():
+                for doc_id in manifest.vanished():
+                    sink.delete(doc_id)
+                    removed += 1
+    finally:
+        pool.close()
+    sink.report("db_oracle")
+    # objects whose docs failed to write are re-harvested on the next run
+    failed = {err["id"] for err in sink.errors}
+    for manifest in manifests.values():
+        manifest.forget(failed)
+        manifest.save()
+    print(f"[db_oracle] metadata sync complete: {sum(c[1] for c in counts.values())} objects harvested, "
+          f"{removed} docs of dropped objects deleted")
 
-    # Tables & columns
-    cur.execute("""
-      SELECT atc.OWNER, atc.TABLE_NAME, atc.COLUMN_NAME, atc.DATA_TYPE
-      FROM ALL_TAB_COLUMNS atc WHERE OWNER NOT IN ('SYS','SYSTEM') FETCH FIRST 5000 ROWS ONLY
-    """)
-    for owner, t, c, dt in cur:
-        doc = {
-            "id": f"dbcol:{owner}.{t}.{c}",
-            "kind": "Column",
-            "repo": "oracle",
-            "path": f"{owner}.{t}.{c}",
-            "sha": "<db>",
-            "source_env": "legacy",
-            "text": f"{owner}.{t}.{c} {dt}",
-            "anchors": [owner, t, c, dt]
-        }
-        upsert(doc)
-
-    # Views
-    cur.execute("""
-      SELECT OWNER, VIEW_NAME, TEXT FROM ALL_VIEWS WHERE OWNER NOT IN ('SYS','SYSTEM') FETCH FIRST 500 ROWS ONLY
-    """)
-    for owner, v, txt in cur:
-        upsert({
-            "id": f"view:{owner}.{v}",
-            "kind": "View",
-            "repo": "oracle",
-            "path": f"{owner}.{v}",
-            "sha": "<db>",
-            "source_env": "legacy",
-            "text": (txt or "")[:16000],
-            "anchors": [owner, v]
-        })
-
-    # Procedures
-    cur.execute("""
-      SELECT OWNER, OBJECT_NAME, OBJECT_TYPE FROM ALL_OBJECTS 
-      WHERE OBJECT_TYPE IN ('PROCEDURE','FUNCTION','TRIGGER') AND OWNER NOT IN ('SYS','SYSTEM') FETCH FIRST 1000 ROWS ONLY
-    """)
-    for owner, name, typ in cur:
-        upsert({
-            "id": f"proc:{owner}.{name}",
-            "kind": "Procedure" if typ in ('PROCEDURE','FUNCTION') else "Trigger",
-            "repo": "oracle",
-            "path": f"{owner}.{name}",
-            "sha": "<db>",
-            "source_env": "legacy",
-            "text": f"{typ} {owner}.{name}",
-            "anchors": [owner, name, typ]
-        })
-
-    cur.close(); conn.close()
-    print("[db_oracle] metadata load complete")
+if __name__ == "__main__":
+    import argparse
+    p = argparse.ArgumentParser()
+    p.add_argument("--full", action="store_true", help="re-harvest every object regardless of LAST_DDL_TIME")
+    p.add_argument("--workers", type=int, default=ORACLE_WORKERS)
+    a = p.parse_args()
+    run(workers=a.workers, full=a.full)
@@ -0,0 +1,80 @@
+import os, subprocess
+from collections import defaultdict
+from typing import Dict, Iterator, Sequence, Tuple
+from .scanner import IGNORE_DIRS, matcher
+
+GIT = os.getenv("GIT_BIN", "git")
+
+def _git(repo_path: str, *args: str) -> bytes:
+    return subprocess.run([GIT, "-C", repo_path, *args], check=True,
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE).stdout
+
+def resolve(repo_path: str, ref: str) -> str:
+    """Commit sha for a branch, tag or sha."""
+    return _git(repo_path, "rev-parse", "--verify", f"{ref}^{{commit}}").decode().strip()
+
+def ls_tree(repo_path: str, commit: str) -> Iterator[Tuple[str, str]]:
+    """(path, blob sha) for every regular file in a commit's tree."""
+    out = _git(repo_path, "ls-tree", "-r", "-z", "--full-tree", commit)
+    for rec in out.split(b"\0"):
+        if not rec:
+            continue
+        meta, path = rec.split(b"\t", 1)
+        mode, kind, oid = meta.split(b" ")
+        # skip submodules (commit) and symlinks (120000)
+        if kind == b"blob" and mode != b"120000":
+            yield path.decode("utf-8", errors="surrogateescape"), oid.decode()
+
+class CatFile:
+    """One long-lived `git cat-file --batch` process per repo.
+
+    Blobs are requested by sha over stdin, so reading thousands of files
+    costs one process instead of one per file.
+    """
+
+    def __init__(self, repo_path: str):
+        self.repo_path = repo_path
+        self._proc = subprocess.Popen([GIT, "-C", repo_path, "cat-file", "--batch"],
+                                      stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+
+    def __enter__(self) -> "CatFile":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def read(self, oid: str) -> bytes:
+        self._proc.stdin.write(oid.encode() + b"\n")
+        self._proc.stdin.flush()
+        header = self._proc.stdout.readline().split()
+        if len(header) != 3:
+            raise KeyError(f"{self.repo_path}: object {oid} missing")
+        data = self._proc.stdout.read(int(header[2]))
+        self._proc.stdout.read(1)  # trailing LF
+        return data
+
+    def close(self):
+        if self._proc.poll() is None:
+            self._proc.stdin.close()
+            self._proc.wait()
+
+def tree_files(repo_path: str, commits: Dict[str, str], patterns: Dict[str, Sequence[str]],
+               ignore=IGNORE_DIRS) -> Iterator[Tuple[str, str, Dict[str, str]]]:
+    """Yield (extractor, path, {ref: blob sha}) over the union of several trees.
+
+    Grouping by path lets a caller parse each distinct blob of a file once
+    and fan the result out to every ref that carries it.
+    """
+    match = matcher(patterns)
+    ignore = frozenset(ignore)
+    by_path: Dict[str, Dict[str, str]] = defaultdict(dict)
+    for ref, commit in commits.items():
+        for path, oid in ls_tree(repo_path, commit):
+            parts = path.split("/")
+            if ignore.intersection(parts[:-1]):
+                continue
+            if match(parts[-1]):
+                by_path[path][ref] = oid
+    for path in sorted(by_path):
+        yield match(path.rsplit("/", 1)[-1]), path, by_path[path]
@@ -1,36 +1,76 @@
-import os, re
-from pathlib import Path
-from retrievers.pipeline import upsert
+import os
+from typing import Dict, Any, List
+from .manifest import blob_sha
+from .java_syntax import outline, identifiers
+from .chunker import chunk_doc
 
-CLASS_RX = re.compile(r"\bclass\s+([A-Za-z_][A-Za-z0-9_]*)")
-IDENT_RX = re.compile(r"[A-Za-z_][A-Za-z0-9_]{3,}")
+JAVA_GLOBS = ("*.java",)
+ANCHOR_LIMIT = 100
 
-def index_repo_java(root: str):
-    rootp = Path(root)
-    repo = rootp.name
-    for path in rootp.rglob("*.java"):
-        try:
-            rel = str(path.relative_to(rootp)).replace("\\","/")
-            text = path.read_text(errors="ignore")
-            classes = CLASS_RX.findall(text)
-            methods = []
-            for m in re.finditer(r"\b([A-Za-z_][A-Za-z0-9_]*)\s*\(", text):
-                # skip constructor calls (preceded by 'new')
-                if text[max(0,m.start()-10):m.start()].strip().startswith("new"):
-                    continue
-                methods.append(m.group(1))
-            idents = set(IDENT_RX.findall(text))
-            anchors = sorted(set(list(classes)+methods+list(idents)))[:500]
-            doc = {
-                "id": f"code:{repo}:{rel}",
-                "kind": "Code",
-                "repo": repo,
-                "path": "/" + rel if not rel.startswith("/") else rel,
-                "sha": "<fs>",
-                "source_env": os.getenv("SOURCE_ENV","legacy"),
-                "text": text[:16000],
-                "anchors": anchors,
-            }
-            upsert(doc)
-        except Exception as e:
-            print(f"[java_parser] error {path}: {e}")
+def _base(repo: str, rel: str, sha: str) -> Dict[str, Any]:
+    return {"kind": "Code", "repo": repo, "path": "/" + rel.lstrip("/"), "sha": sha,
+            "source_env": os.getenv("SOURCE_ENV","legacy")}
+
+def _type_outline(t: Dict[str, Any], package: str) -> str:
+    """Compact, line-annotated declaration listing of one type."""
+    out = [f"package {package};"] if package else []
+    out.append(" ".join(t["annotations"] + [t["header"]]) + " {")
+    if t["constants"]:
+        out.append("  " + ", ".join(t["constants"]) + ";")
+    for m in t["fields"] + t["methods"]:
+        lines = f"L{m['start']}" if m["start"] == m["end"] else f"L{m['start']}-{m['end']}"
+        out.append("  " + " ".join(m["annotations"] + [m["signature"]]) + f";  // {lines}")
+    out.append("}")
+    return "\n".join(out)
+
+def parse_java(repo: str, rel: str, data: bytes) -> List[Dict[str, Any]]:
+    """One doc per type (its outline) and per method/constructor body (its source).
+
+    Long method bodies are split into overlapping chunks; all docs of a file
+    share `parent` = `code:<repo>:<rel>`, so search returns one hit per file.
+
+    Ids are `code:<repo>:<rel>#<Type>` and `code:<repo>:<rel>#<Type>.<name>(<param types>)`;
+    every doc carries start_line/end_line. A file without type declarations
+    (package-info, module-info, unparseable input) is kept as one file doc.
+    """
+    text = data.decode("utf-8", errors="ignore")
+    sha = blob_sha(data)
+    lines = text.split("\n")
+    o = outline(text)
+    toks = o["tokens"]
+    package = o["package"]
+    prefix = f"code:{repo}:{rel}"
+    if not o["types"]:
+        idents, _ = identifiers(toks, ANCHOR_LIMIT)
+        return chunk_doc({**_base(repo, rel, sha), "id": prefix, "symbol": package, "symbol_kind": "file",
+                          "text": text, "anchors": idents})
+    docs = []
+    for t in o["types"]:
+        symbol = f"{package}.{t['qualname']}" if package else t["qualname"]
+        members = [m["name"] for m in t["fields"] + t["methods"]]
+        docs.append({
+            **_base(repo, rel, sha),
+            "id": f"{prefix}#{t['qualname']}",
+            "symbol": symbol,
+            "symbol_kind": t["kind"],
+            "start_line": t["start"],
+            "end_line": t["end"],
+            "text": _type_outline(t, package),
+            "anchors": list(dict.fromkeys([t["name"], symbol] + t["annotations"] + t["constants"] + members)),
+            "parent": prefix,
+        })
+        for m in t["methods"]:
+            if "body" not in m:
+                continue  # abstract/interface methods live in the type outline only
+            idents, calls = identifiers(toks[m["body"][0]:m["body"][1]], ANCHOR_LIMIT)
+            docs.extend(chunk_doc({
+                **_base(repo, rel, sha),
+                "id": f"{prefix}#{t['qualname']}.{m['name']}({','.join(m['params'])})",
+                "symbol": f"{symbol}.{m['name']}",
+                "symbol_kind": m["kind"],
+                "text": "\n".join(lines[m["start"] - 1:m["end"]]),
+                "anchors": list(dict.fromkeys([m["name"], f"{t['qualname']}.{m['name']}"] + m["annotations"]
+                                              + idents))[:ANCHOR_LIMIT],
+                "calls": calls,
+            }, first_line=m["start"], parent=prefix))
+    return docs
@@ -0,0 +1,277 @@
+import re
+from collections import namedtuple
+from typing import Dict, Any, List, Tuple
+
+# A small Java lexer plus a declaration-level parser. Method and initializer
+# bodies are skipped as balanced blocks, so only package/imports, types,
+# fields and method signatures are parsed; comments and literals never
+# reach the parser.
+
+Tok = namedtuple("Tok", "kind value line")
+
+TOKEN_RX = re.compile(r'''
+  (?P<ws>\s+)
+| (?P<comment>//[^\n]*|/\*.*?\*/)
+| (?P<lit>"""(?:\\.|[^\\])*?"""|"(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*')
+| (?P<ident>[A-Za-z_$][\w$]*)
+| (?P<number>\.?\d(?:[eEpP][+-]|[\w.])*)
+| (?P<op>\.\.\.|::|->|[^\s\w])
+''', re.S | re.X)
+
+KEYWORDS = frozenset("""
+abstract assert boolean break byte case catch char class const continue default do double
+else enum extends final finally float for goto if implements import instanceof int interface
+long native new package private protected public return short static strictfp super switch
+synchronized this throw throws transient try void volatile while var yield record sealed
+permits non true false null
+""".split())
+MODIFIERS = frozenset("public protected private static final abstract native synchronized "
+                      "transient volatile strictfp default sealed non".split())
+TYPE_KEYWORDS = ("class", "interface", "enum", "record")
+
+def tokenize(text: str) -> List[Tok]:
+    toks, line = [], 1
+    for m in TOKEN_RX.finditer(text):
+        kind, value = m.lastgroup, m.group()
+        if kind not in ("ws", "comment"):
+            toks.append(Tok(kind, value, line))
+        line += value.count("\n")
+    return toks
+
+def join(toks) -> str:
+    """Render tokens as compact source: `Map<K, V> get(String key)`."""
+    out = []
+    prev = None
+    for t in toks:
+        v = t.value
+        generic = v == "<" and prev is not None and prev not in KEYWORDS
+        if prev is not None and not generic and v not in (".", ",", ")", "]", ">", "(", "[", ";", "...") \
+                and prev not in (".", "(", "[", "<", "@"):
+            out.append(" ")
+        out.append(v)
+        prev = v
+    return "".join(out)
+
+def _match(toks: List[Tok], i: int, open_: str, close: str) -> int:
+    """Index just past the token closing the bracket opened at toks[i]."""
+    depth = 0
+    for j in range(i, len(toks)):
+        v = toks[j].value
+        if toks[j].kind == "op":
+            if v == open_:
+                depth += 1
+            elif v == close:
+                depth -= 1
+                if depth == 0:
+                    return j + 1
+    return len(toks)
+
+def _split_top(toks: List[Tok]) -> List[List[Tok]]:
+    # split on commas outside (), <>, [] and {}
+    parts, cur, depth = [], [], 0
+    for t in toks:
+        if t.kind == "op" and t.value in "(<[{":
+            depth += 1
+        elif t.kind == "op" and t.value in ")>]}":
+            depth -= 1
+        if t.value == "," and depth == 0:
+            parts.append(cur)
+            cur = []
+        else:
+            cur.append(t)
+    if cur:
+        parts.append(cur)
+    return parts
+
+def _type_keyword(stmt: List[Tok]) -> int:
+    for k, t in enumerate(stmt):
+        if t.kind != "ident" or t.value not in TYPE_KEYWORDS:
+            continue
+        if k and stmt[k - 1].value == ".":
+            continue
+        if k + 1 < len(stmt) and stmt[k + 1].kind == "ident":
+            if t.value == "record" and (k + 2 >= len(stmt) or stmt[k + 2].value not in ("(", "<")):
+                continue
+            return k
+    return -1
+
+def _method_paren(stmt: List[Tok]) -> int:
+    for k, t in enumerate(stmt):
+        if t.value == "=":
+            return -1
+        if t.value == "(":
+            prev = stmt[k - 1] if k else None
+            if prev is not None and prev.kind == "ident" and prev.value not in KEYWORDS:
+                return k
+            return -1
+    return -1
+
+def _param_types(params: List[Tok]) -> List[str]:
+    types = []
+    for part in _split_top(params):
+        part = [t for t in part if t.value != "final"]
+        # drop parameter annotations (@X, @a.b.X(...))
+        kept, k = [], 0
+        while k < len(part):
+            if part[k].value == "@":
+                k += 2
+                while k + 1 < len(part) and part[k].value == ".":
+                    k += 2
+                if k < len(part) and part[k].value == "(":
+                    k = _match(part, k, "(", ")")
+                continue
+            kept.append(part[k])
+            k += 1
+        if kept and kept[-1].kind == "ident":
+            kept = kept[:-1]
+        if kept:
+            types.append(join(kept))
+    return types
+
+def identifiers(toks: List[Tok], limit: int) -> Tuple[List[str], List[str]]:
+    """Identifiers (first-occurrence order) and invoked names in a token span."""
+    idents, calls = {}, {}
+    for k, t in enumerate(toks):
+        if t.kind != "ident" or t.value in KEYWORDS:
+            continue
+        idents.setdefault(t.value, None)
+        if k + 1 < len(toks) and toks[k + 1].value == "(" and (not k or toks[k - 1].value != "new"):
+            calls.setdefault(t.value, None)
+    return list(idents)[:limit], list(calls)[:limit]
+
+def outline(text: str) -> Dict[str, Any]:
+    """Parse declarations: package, imports, and per type its fields and methods.
+
+    Every declaration carries 1-based `start`/`end` lines; start includes its
+    annotations. Nested types are listed flat with a dotted `qualname`.
+    """
+    toks = tokenize(text)
+    n = len(toks)
+    out: Dict[str, Any] = {"package": "", "imports": [], "types": []}
+    stack: List[Dict[str, Any]] = []
+    stmt: List[Tok] = []
+    annos: List[Tok] = []
+
+    def start_line() -> int:
+        return min(x.line for x in annos[:1] + stmt[:1])
+
+    def annotations() -> List[str]:
+        return [a.value for a in annos]
+
+    def member(kind: str, name: str, sig: List[Tok], end: int, **extra) -> Dict[str, Any]:
+        return {"kind": kind, "name": name, "signature": join(sig), "annotations": annotations(),
+                "start": start_line(), "end": end, **extra}
+
+    def end_statement(line: int):
+        if not stmt:
+            return
+        top = stack[-1] if stack else None
+        head = stmt[0].value
+        if top is None:
+            if head == "package":
+                out["package"] = join(stmt[1:]).replace(" ", "")
+            elif head == "import":
+                static = len(stmt) > 1 and stmt[1].value == "static"
+                name = join(stmt[2 if static else 1:]).replace(" ", "")
+                out["imports"].append(f"static {name}" if static else name)
+            return
+        if top["kind"] == "enum" and top["constants"] is None:
+            top["constants"] = [p[0].value for p in _split_top(stmt) if p and p[0].kind == "ident"]
+            return
+        p = _method_paren(stmt)
+        if p >= 0:
+            close = _match(stmt, p, "(", ")")
+            top["methods"].append(member("method", stmt[p - 1].value, stmt, line,
+                                         params=_param_types(stmt[p + 1:close - 1])))
+            return
+        eq = next((k for k, t in enumerate(stmt) if t.value == "="), len(stmt))
+        names = [t.value for t in stmt[:eq] if t.kind == "ident" and t.value not in KEYWORDS]
+        if names:
+            top["fields"].append(member("field", names[-1], stmt[:eq], line))
+
+    i = 0
+    while i < n:
+        t = toks[i]
+        v = t.value
+        if t.kind == "op" and v == "@" and i + 1 < n and toks[i + 1].value != "interface":
+            j = i + 2
+            while j + 1 < n and toks[j].value == "." and toks[j + 1].kind == "ident":
+                j += 2
+            name = "@" + join(toks[i + 1:j]).replace(" ", "")
+            if j < n and toks[j].value == "(":
+                j = _match(toks, j, "(", ")")
+            # kept out of stmt so annotation arguments never look like a parameter list
+            annos.append(Tok("anno", name, t.line))
+            i = j
+            continue
+        if t.kind == "op" and v == "(":
+            j = _match(toks, i, "(", ")")
+            stmt.extend(toks[i:j])
+            i = j
+            continue
+        if t.kind == "op" and v == ";":
+            end_statement(t.line)
+            stmt, annos = [], []
+            i += 1
+            continue
+        if t.kind == "op" and v == "{":
+            top = stack[-1] if stack else None
+            k = _type_keyword(stmt)
+            if k >= 0:
+                kind = "@interface" if k and stmt[k - 1].value == "@" else stmt[k].value
+                name = stmt[k + 1].value
+                stack.append({"kind": kind, "name": name,
+                              "qualname": f"{top['qualname']}.{name}" if top else name,
+                              "header": join(stmt), "annotations": annotations(),
+                              "modifiers": [x.value for x in stmt[:k] if x.value in MODIFIERS],
+                              "start": start_line(), "end": t.line,
+                              "fields": [], "methods": [],
+                              "constants": None if kind == "enum" else []})
+                if kind == "record":
+                    # component types, the parameters of the canonical constructor
+                    p = next(x for x in range(k + 2, len(stmt)) if stmt[x].value == "(")
+                    stack[-1]["components"] = _param_types(stmt[p + 1:_match(stmt, p, "(", ")") - 1])
+                out["types"].append(stack[-1])
+                stmt, annos = [], []
+                i += 1
+                continue
+            j = _match(toks, i, "{", "}")
+            end = toks[j - 1].line
+            if top and top["kind"] == "enum" and top["constants"] is None:
+                # enum constant with a body: keep collecting the constant list
+                i = j
+                continue
+            p = _method_paren(stmt) if top else -1
+            if p >= 0:
+                close = _match(stmt, p, "(", ")")
+                name = stmt[p - 1].value
+                top["methods"].append(member("constructor" if name == top["name"] else "method",
+                                             name, stmt, end, params=_param_types(stmt[p + 1:close - 1]),
+                                             body=(i, j)))
+                stmt, annos = [], []
+            elif top and top["kind"] == "record" and stmt and stmt[-1].value == top["name"] \
+                    and all(x.value in MODIFIERS for x in stmt[:-1]):
+                # compact canonical constructor: `R { ... }`, no parameter list
+                top["methods"].append(member("constructor", top["name"], stmt, end,
+                                             params=top["components"], body=(i, j)))
+                stmt, annos = [], []
+            elif any(x.value == "=" for x in stmt):
+                # array/anonymous-class/lambda initializer: the field ends at ';'
+                stmt.extend(toks[i:j])
+            else:
+                # static/instance initializer
+                stmt, annos = [], []
+            i = j
+            continue
+        if t.kind == "op" and v == "}":
+            if stack:
+                end_statement(t.line)
+                top = stack.pop()
+                top["end"] = t.line
+            stmt, annos = [], []
+            i += 1
+            continue
+        stmt.append(t)
+        i += 1
+    out["tokens"] = toks
+    return out
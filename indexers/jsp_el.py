@@ -1,9 +1,22 @@
 import os, re
-from pathlib import Path
 from typing import Dict, Any, List
-from retrievers.pipeline import upsert
+from .manifest import blob_sha
+from .chunker import chunk_doc
+from .webpaths import resolve, web_path
 
 EL_RX = re.compile(r"\$\{([^}]+)\}")
+ATTR = r"""\s*=\s*["']([^"']+)["']"""
+# (regex, edge type, how the target resolves); file-relative unless it starts with "/"
+INCLUDE_RXS = [
+    (re.compile(r"<%@\s*include\s+file" + ATTR), "INCLUDES", "directive"),
+    (re.compile(r"<jsp:include\b[^>]*?\bpage" + ATTR), "INCLUDES", "jsp:include"),
+    (re.compile(r"<c:import\b[^>]*?\burl" + ATTR), "INCLUDES", "c:import"),
+    (re.compile(r"<tiles:insert(?:Template)?\b[^>]*?\b(?:page|template)" + ATTR), "INCLUDES", "tiles"),
+    (re.compile(r"<tiles:insert\b[^>]*?\bdefinition" + ATTR), "INSERTS", "tiles"),
+    (re.compile(r"<tiles:insertDefinition\b[^>]*?\bname" + ATTR), "INSERTS", "tiles"),
+]
+
+JSP_GLOBS = ("*.jsp", "*.jspf")
 
 def extract_el(text: str) -> List[str]:
     toks = set()
@@ -11,25 +24,47 @@ def extract_el(text: str) -> List[str]:
         toks.add(m.group(1).strip())
     return sorted(toks)
 
-def index_repo_jsp(root: str):
-    rootp = Path(root)
-    repo_name = rootp.name
-    for ext in ("*.jsp","*.jspf"):
-        for path in rootp.rglob(ext):
-            try:
-                rel = str(path.relative_to(rootp)).replace("\\","/")
-                text = path.read_text(errors="ignore")
-                anchors = extract_el(text)
-                doc = {
-                    "id": f"jsp:{repo_name}:{rel}",
-                    "kind": "JSPView",
-                    "repo": repo_name,
-                    "path": "/" + rel if not rel.startswith("/") else rel,
-                    "sha": "<fs>",
-                    "source_env": os.getenv("SOURCE_ENV","legacy"),
-                    "text": text[:16000],
-                    "anchors": anchors,
-                }
-                upsert(doc)
-            except Exception as e:
-                print(f"[jsp_el] error {path}: {e}")
+def extract_includes(repo: str, rel: str, text: str) -> List[Dict[str, Any]]:
+    """Static and runtime includes, c:import and tiles inserts as edges.
+
+    JSP targets resolve to `jsp:<repo>:<rel>` ids, tiles definitions to
+    `tiles:<repo>:<name>`. Dynamic (EL/scriptlet) and external targets are
+    skipped.
+    """
+    edges, seen = [], set()
+    for rx, edge_type, via in INCLUDE_RXS:
+        for m in rx.finditer(text):
+            target = m.group(1).strip()
+            if not target or "${" in target or "<%" in target or "://" in target:
+                continue
+            if edge_type == "INSERTS":
+                edge = {"type": edge_type, "target": f"tiles:{repo}:{target}", "path": target, "via": via}
+            else:
+                path = resolve(rel, target)
+                edge = {"type": edge_type, "target": f"jsp:{repo}:{path}", "path": "/" + path, "via": via}
+            if edge["target"] not in seen:
+                seen.add(edge["target"])
+                edges.append(edge)
+    return edges
+
+def parse_jsp(repo_name: str, rel: str, data: bytes) -> List[Dict[str, Any]]:
+    text = data.decode("utf-8", errors="ignore")
+    anchors = extract_el(text)
+    edges = extract_includes(repo_name, rel, text)
+    docs = chunk_doc({
+        "id": f"jsp:{repo_name}:{rel}",
+        "kind": "JSPView",
+        "repo": repo_name,
+        "path": "/" + rel if not rel.startswith("/") else rel,
+        "web_path": web_path(rel),
+        "sha": blob_sha(data),
+        "source_env": os.getenv("SOURCE_ENV","legacy"),
+        "text": text,
+        "anchors": anchors,
+        "includes": [e["path"] for e in edges],
+        "edges": edges,
+    })
+    # the graph needs the edges once per page, not once per chunk
+    for d in docs[1:]:
+        d["edges"] = []
+    return docs
@@ -0,0 +1,116 @@
+import os, re, json, hashlib
+from typing import Dict, Any, List, Optional, Iterable
+
+MANIFEST_DIR = os.getenv("INDEX_MANIFEST_DIR", ".traceit/manifests")
+
+def blob_sha(data: bytes) -> str:
+    """Content hash in git's blob format, so fs and git sources agree."""
+    h = hashlib.sha1(b"blob %d\0" % len(data))
+    h.update(data)
+    return h.hexdigest()
+
+class Manifest:
+    """Per-repo record of path -> size, mtime, content hash and doc ids.
+
+    A file whose size and mtime match its entry is skipped without being
+    read; one whose hash still matches after a re-read is not re-shipped.
+    Entries not seen during a walk belong to deleted files.
+
+    `identity` names what the entries are valid against (the target index
+    and the extractor version); a saved manifest with a different identity
+    is discarded on load, so every file is parsed and shipped again.
+    """
+
+    def __init__(self, name: str, entries: Optional[Dict[str, Dict[str, Any]]] = None,
+                 identity: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.entries: Dict[str, Dict[str, Any]] = entries or {}
+        self.identity = identity
+        self.seen: set = set()
+
+    @staticmethod
+    def path_for(name: str) -> str:
+        # labels like repo@release/1.0 carry ref names
+        return os.path.join(MANIFEST_DIR, re.sub(r"[^\w.@-]", "_", name) + ".json")
+
+    @staticmethod
+    def names(prefix: str) -> List[str]:
+        """Names of saved manifests starting with `prefix`."""
+        try:
+            files = os.listdir(MANIFEST_DIR)
+        except FileNotFoundError:
+            return []
+        return sorted(f[:-5] for f in files if f.startswith(prefix) and f.endswith(".json"))
+
+    @classmethod
+    def load(cls, name: str, identity: Dict[str, Any]) -> "Manifest":
+        try:
+            with open(cls.path_for(name), encoding="utf-8") as f:
+                saved = json.load(f)
+        except FileNotFoundError:
+            return cls(name, identity=identity)
+        if saved.get("identity") != identity:
+            print(f"[manifest] {name}: built for {saved.get('identity')}, not {identity}; starting over")
+            return cls(name, identity=identity)
+        return cls(name, saved.get("files", {}), identity)
+
+    @classmethod
+    def rebind(cls, prefix: str, old_index: str, new_index: str, skip: Iterable[str] = ()):
+        """Move saved manifests starting with `prefix` from `old_index` to
+        `new_index`, for sources whose docs a rebuild copied across."""
+        # names() returns file names, which differ from labels with "/" or ":"
+        skip = {cls.path_for(name) for name in skip}
+        for name in cls.names(prefix):
+            if cls.path_for(name) in skip:
+                continue
+            with open(cls.path_for(name), encoding="utf-8") as f:
+                saved = json.load(f)
+            identity = saved.get("identity") or {}
+            if identity.get("index") == old_index:
+                manifest = cls(name, saved.get("files", {}), {**identity, "index": new_index})
+                manifest.save()
+
+    def save(self):
+        path = self.path_for(self.name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"identity": self.identity, "files": self.entries}, f)
+        os.replace(tmp, path)
+
+    def unchanged(self, rel: str, st: os.stat_result) -> bool:
+        self.seen.add(rel)
+        e = self.entries.get(rel)
+        return bool(e) and e["size"] == st.st_size and e["mtime_ns"] == st.st_mtime_ns
+
+    def unchanged_blob(self, rel: str, sha: str) -> bool:
+        """Like unchanged(), for git sources where the blob sha is known up front."""
+        self.seen.add(rel)
+        return self.entries.get(rel, {}).get("sha") == sha
+
+    def update(self, rel: str, st: Optional[os.stat_result], sha: Optional[str], ids: Iterable[str]) -> List[str]:
+        """Record a parsed file; return ids it produced before but not now."""
+        ids = sorted(set(ids))
+        old = self.entries.get(rel, {}).get("ids", [])
+        self.entries[rel] = {"size": st.st_size if st else None, "mtime_ns": st.st_mtime_ns if st else None,
+                             "sha": sha, "ids": ids}
+        return sorted(set(old) - set(ids))
+
+    def same_content(self, rel: str, sha: Optional[str], ids: Iterable[str]) -> bool:
+        e = self.entries.get(rel)
+        return bool(e) and e.get("sha") == sha and e.get("ids") == sorted(set(ids))
+
+    def vanished(self) -> List[str]:
+        """Drop entries for files not seen in this walk; return their doc ids."""
+        gone = []
+        for rel in sorted(set(self.entries) - self.seen):
+            gone.extend(self.entries.pop(rel).get("ids", []))
+        return gone
+
+    def forget(self, ids: Iterable[str]):
+        """Drop entries owning any of `ids` so those files are re-parsed."""
+        ids = set(ids)
+        if not ids:
+            return
+        for rel in [r for r, e in self.entries.items() if ids.intersection(e.get("ids", []))]:
+            del self.entries[rel]
@@ -1,31 +1,277 @@
-import csv, os, sys
-from .jsp_el import index_repo_jsp
-from .struts_xml import index_repo_struts
-from .java_parser import index_repo_java
-from retrievers.pipeline import ensure_index
+import csv, os, sys, threading, time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Any, Callable, Iterable, List, Iterator, Optional, Tuple
+from .jsp_el import parse_jsp, JSP_GLOBS
+from .struts_xml import parse_struts, STRUTS_GLOBS
+from .java_parser import parse_java, JAVA_GLOBS
+from .tiles_xml import parse_tiles, TILES_GLOBS
+from .manifest import Manifest, blob_sha
+from .scanner import scan
+from .git_source import CatFile, resolve, tree_files
+from .stages import Pipeline, Stage
+from retrievers.pipeline import BulkWriter, SEARCH_BACKEND, ensure_index, index_identity, rebuild_index, bulk_writer
 
-USAGE = "Usage: python -m indexers.run --repos config/repos.csv"
+USAGE = "Usage: python -m indexers.run --repos config/repos.csv [--rebuild] [--full] [--workers N]"
+# repos.csv: `repo` is a local path; an optional `ref` column indexes that
+# branch/tag/sha straight from git objects (one row per ref, no checkout needed)
 
-def run(csv_path: str):
-    ensure_index()
+# extractor name -> (glob patterns, per-file parser returning docs)
+EXTRACTORS = {
+    "java": (JAVA_GLOBS, parse_java),
+    "jsp": (JSP_GLOBS, parse_jsp),
+    "struts": (STRUTS_GLOBS, parse_struts),
+    "tiles": (TILES_GLOBS, parse_tiles),
+}
+PATTERNS = {name: globs for name, (globs, _) in EXTRACTORS.items()}
+# bump when any extractor's output changes, so files unchanged on disk are
+# parsed again instead of being skipped by the manifest
+EXTRACTOR_VERSION = 4
+CHUNK_FILES = int(os.getenv("INDEX_CHUNK_FILES", "64"))
+
+def _tasks(label: str, repo_path: str, manifest: Manifest, full: bool = False) -> Iterator[tuple]:
+    """Files of one working tree that need parsing; unchanged ones are only marked seen."""
+    print(f"[index] {repo_path}")
+    rootp = Path(repo_path)
+    for name, entry in scan(repo_path, PATTERNS):
+        rel = Path(entry.path).relative_to(rootp).as_posix()
+        st = entry.stat()
+        if manifest.unchanged(rel, st) and not full:
+            continue
+        yield name, label, entry.path, rel, st
+
+def _task_chunks(sources: List[Tuple[str, str]], manifests: Dict[str, Manifest], full: bool) -> Iterator[List[tuple]]:
+    tasks = (t for label, repo_path in sources for t in _tasks(label, repo_path, manifests[label], full))
+    while True:
+        chunk = list(islice(tasks, CHUNK_FILES))
+        if not chunk:
+            return
+        yield chunk
+
+def _parse_file(name: str, label: str, path: str, rel: str) -> Tuple[str, List[Dict[str, Any]]]:
+    data = Path(path).read_bytes()
+    return blob_sha(data), EXTRACTORS[name][1](label, rel, data)
+
+def _parse_chunk(tasks: List[tuple]) -> Tuple[int, float, List[tuple], List[str]]:
+    """Worker entry point: parse a chunk of files, never raise per file.
+
+    Returns the worker pid and its parse seconds along with the results, for
+    the per-worker summary.
+    """
+    t0 = time.perf_counter()
+    results, errors = [], []
+    for task in tasks:
+        try:
+            results.append((task, *_parse_file(*task[:4])))
+        except Exception as e:
+            errors.append(f"[{task[0]}] {task[2]}: {e}")
+    return os.getpid(), time.perf_counter() - t0, results, errors
+
+def _changes(manifest: Manifest, rel: str, st, sha: str, docs: List[Dict[str, Any]],
+             full: bool = False) -> Optional[Tuple[List[str], List[Dict[str, Any]]]]:
+    """(ids to delete, docs to index) for a parsed file, or None if its hash
+    and ids match the manifest. Ids the file produced last time but not now
+    are deleted."""
+    ids = [d["id"] for d in docs]
+    if not full and manifest.same_content(rel, sha, ids):
+        manifest.update(rel, st, sha, ids)
+        return None
+    return manifest.update(rel, st, sha, ids), docs
+
+def _index(tag: str, source: Iterable[Any], parse: Callable[[Any], Iterable[tuple]], threads: int,
+           manifests: Dict[str, Manifest], sink: BulkWriter, full: bool = False) -> int:
+    """Run scan -> parse -> enrich -> sink over bounded queues; return files shipped.
+
+    `source` yields work items, `parse` turns one into (task, sha, docs)
+    results with task[1] the repo label, task[3] the rel path and task[4]
+    the stat (None for git blobs). Manifest updates happen in the single
+    enrich thread and bulk writes in the single sink thread, so a slow
+    index backs up into parsing instead of stalling it per doc.
+    """
+    def enrich(result):
+        task, sha, docs = result
+        change = _changes(manifests[task[1]], task[3], task[4], sha, docs, full)
+        if change:
+            yield change
+
+    def ship(change):
+        stale, docs = change
+        for doc_id in stale:
+            sink.delete(doc_id)
+        sink.extend(docs)
+
+    pipe = Pipeline(tag, [Stage("parse", parse, threads), Stage("enrich", enrich),
+                          Stage("sink", ship, fatal=True)])
+    pipe.run(source)
+    pipe.report()
+    return pipe.stages[-1].items
+
+def index_trees(sources: List[Tuple[str, str]], manifests: Dict[str, Manifest], sink: BulkWriter,
+                workers: int = 1, full: bool = False) -> int:
+    """Index working trees, parsing chunks of files in-process or in a process pool.
+
+    Doc ids derive from repo and path only, so completion order does not
+    matter. With a pool, 2 parse threads per worker keep it busy while the
+    queues bound how many parsed chunks wait for the sink.
+    """
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    if pool:
+        # fork the workers before the pipeline threads start
+        pool.submit(int).result()
+    # pid -> [chunks, files, parse seconds, errors]; parse runs in several threads
+    stats: Dict[int, list] = defaultdict(lambda: [0, 0, 0.0, []])
+    lock = threading.Lock()
+
+    def parse(chunk):
+        pid, seconds, results, errors = pool.submit(_parse_chunk, chunk).result() if pool else _parse_chunk(chunk)
+        with lock:
+            s = stats[pid]
+            s[0] += 1
+            s[1] += len(chunk)
+            s[2] += seconds
+            s[3].extend(errors)
+        return results
+
+    try:
+        return _index("index", _task_chunks(sources, manifests, full), parse, workers * 2 if pool else 1,
+                      manifests, sink, full)
+    finally:
+        if pool:
+            pool.shutdown()
+        for pid, (chunks, files, seconds, errors) in sorted(stats.items()):
+            print(f"[index] worker {pid}: {chunks} chunks, {files} files, {files / max(seconds, 1e-9):.1f} files/s, "
+                  f"{len(errors)} errors")
+            for err in errors[:10]:
+                print(f"[index]   {err}")
+
+def _relabel_id(doc_id: str, label: str) -> str:
+    # ids are "<prefix>:<repo>:<rest>"; swap in this ref's repo label
+    prefix, _, rest = doc_id.split(":", 2)
+    return f"{prefix}:{label}:{rest}"
+
+def _relabel(docs: List[Dict[str, Any]], label: str, ref: str, commit: str) -> List[Dict[str, Any]]:
+    out = []
+    for doc in docs:
+        doc = {**doc, "id": _relabel_id(doc["id"], label), "repo": label, "ref": ref, "commit": commit}
+        if doc.get("parent"):
+            doc["parent"] = _relabel_id(doc["parent"], label)
+        if doc.get("edges"):
+            doc["edges"] = [{**e, "target": _relabel_id(e["target"], label)} for e in doc["edges"]]
+        out.append(doc)
+    return out
+
+def index_git(repo_path: str, refs: Dict[str, str], manifests: Dict[str, Manifest], sink: BulkWriter,
+              full: bool = False) -> int:
+    """Index several refs of one repo from git objects, without checkouts.
+
+    `refs` maps ref -> repo label. Blobs stream through one `git cat-file
+    --batch` process in the scan stage; a blob shared by several refs is
+    read and parsed once and its docs are relabeled per ref. A file whose
+    blob sha matches the manifest is skipped without reading it.
+    """
+    commits = {ref: resolve(repo_path, ref) for ref in refs}
+    for ref, commit in commits.items():
+        print(f"[index] {repo_path} @ {ref} ({commit[:12]})")
+
+    def blobs(cat: CatFile):
+        for name, rel, oids in tree_files(repo_path, commits, PATTERNS):
+            todo = {ref: oid for ref, oid in oids.items()
+                    if not manifests[refs[ref]].unchanged_blob(rel, oid) or full}
+            if todo:
+                yield name, rel, todo, {oid: cat.read(oid) for oid in set(todo.values())}
+
+    def parse(item):
+        name, rel, todo, data = item
+        parsed: Dict[str, List[Dict[str, Any]]] = {}
+        for ref, oid in todo.items():
+            label = refs[ref]
+            try:
+                if oid not in parsed:
+                    parsed[oid] = EXTRACTORS[name][1](label, rel, data[oid])
+                docs = _relabel(parsed[oid], label, ref, commits[ref])
+            except Exception as e:
+                print(f"[index] error {ref}:{rel}: {e}")
+                continue
+            yield (name, label, None, rel, None), oid, docs
+
+    with CatFile(repo_path) as cat:
+        return _index("index", blobs(cat), parse, 1, manifests, sink, full)
+
+def run(csv_path: str, rebuild: bool = False, workers: int = 1, full: bool = False):
     with open(csv_path, newline="") as f:
         rdr = csv.DictReader(f)
         if "repo" not in rdr.fieldnames:
             print("repos.csv must have a 'repo' column with local paths", file=sys.stderr)
             sys.exit(1)
+        trees: List[Tuple[str, str]] = []                        # (label, working tree)
+        git_refs: Dict[str, Dict[str, str]] = defaultdict(dict)  # repo path -> ref -> label
         for row in rdr:
             repo_path = row["repo"].strip()
             if not os.path.isdir(repo_path):
                 print(f"[skip] not a directory: {repo_path}")
                 continue
-            print(f"[index] {repo_path}")
-            index_repo_java(repo_path)
-            index_repo_jsp(repo_path)
-            index_repo_struts(repo_path)
+            name = os.path.basename(os.path.normpath(repo_path))
+            ref = (row.get("ref") or "").strip()
+            if ref:
+                git_refs[repo_path][ref] = f"{name}@{ref}"
+            else:
+                trees.append((name, repo_path))
+
+    labels = [label for label, _ in trees] + [l for refs in git_refs.values() for l in refs.values()]
+    previous = index_identity() if rebuild else None
+    if rebuild:
+        # docs from sources this run does not re-ingest (oracle, docs, other repos) are copied across
+        target = rebuild_index(replace_repos=labels)
+        # the fresh index holds none of these repos' docs, so start from empty manifests
+        manifests = {l: Manifest(f"{SEARCH_BACKEND}-{l}") for l in labels}
+        full = True
+    else:
+        ensure_index()
+        target = nullcontext(None)
+        identity = {"index": index_identity(), "extractors": EXTRACTOR_VERSION}
+        manifests = {l: Manifest.load(f"{SEARCH_BACKEND}-{l}", identity) for l in labels}
+
+    with target as index:
+        with bulk_writer(index) as sink:
+            shipped = 0
+            if trees:
+                if workers > 1:
+                    print(f"[index] {len(trees)} repos with {workers} workers")
+                shipped = index_trees(trees, manifests, sink, workers, full)
+            for repo_path, refs in git_refs.items():
+                shipped += index_git(repo_path, refs, manifests, sink, full)
+            removed = 0
+            for manifest in manifests.values():
+                for doc_id in manifest.vanished():
+                    sink.delete(doc_id)
+                    removed += 1
+        sink.report("index")
+        print(f"[index] {shipped} files shipped, {removed} docs of removed files deleted")
+
+    # files whose docs failed to write are re-parsed on the next run; the
+    # identity is read after the load since a rebuild swaps the live index
+    failed = {err["id"] for err in sink.errors}
+    identity = {"index": index_identity(), "extractors": EXTRACTOR_VERSION}
+    for manifest in manifests.values():
+        manifest.forget(failed)
+        manifest.identity = identity
+        manifest.save()
+    if previous is not None:
+        # the copied sources' manifests still describe their docs
+        Manifest.rebind(f"{SEARCH_BACKEND}-", previous, identity["index"], skip=[m.name for m in manifests.values()])
 
 if __name__ == "__main__":
     import argparse
     p = argparse.ArgumentParser()
     p.add_argument("--repos", required=True)
+    p.add_argument("--rebuild", action="store_true",
+                   help="load into a fresh versioned index and swap the alias when done")
+    p.add_argument("--full", action="store_true",
+                   help="re-ship every file even if the manifest says it is unchanged")
+    p.add_argument("--workers", type=int, default=1,
+                   help="parse files in N processes (default: 1, in-process)")
     a = p.parse_args()
-    run(a.repos)
+    run(a.repos, rebuild=a.rebuild, workers=a.workers, full=a.full)
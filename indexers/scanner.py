@@ -0,0 +1,49 @@
+import os, re, fnmatch
+from typing import Dict, Iterator, Iterable, Sequence, Tuple
+
+IGNORE_DIRS = frozenset(d.strip() for d in
+                        os.getenv("INDEX_IGNORE_DIRS", ".git,.svn,.hg,target,node_modules").split(",")
+                        if d.strip())
+
+def matcher(patterns: Dict[str, Sequence[str]]):
+    # one alternation over all globs; the first extractor whose pattern matches wins
+    groups = []
+    for name, globs in patterns.items():
+        alts = "|".join(fnmatch.translate(g) for g in globs)
+        groups.append(f"(?P<{name}>{alts})")
+    rx = re.compile("|".join(groups))
+    def match(filename: str):
+        m = rx.match(filename)
+        return m.lastgroup if m else None
+    return match
+
+def scan(root: str, patterns: Dict[str, Sequence[str]],
+         ignore: Iterable[str] = IGNORE_DIRS) -> Iterator[Tuple[str, os.DirEntry]]:
+    """Walk `root` once and yield (extractor name, DirEntry) per matching file.
+
+    `patterns` maps extractor names to filename globs. Each file goes to one
+    extractor only. Directories named in `ignore` are not entered and
+    symlinked directories are not followed.
+    """
+    match = matcher(patterns)
+    ignore = frozenset(ignore)
+    stack = [root]
+    while stack:
+        d = stack.pop()
+        try:
+            it = os.scandir(d)
+        except OSError as e:
+            print(f"[scan] skip {d}: {e}")
+            continue
+        with it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in ignore:
+                            stack.append(entry.path)
+                    elif entry.is_file():
+                        name = match(entry.name)
+                        if name:
+                            yield name, entry
+                except OSError as e:
+                    print(f"[scan] skip {entry.path}: {e}")
@@ -0,0 +1,142 @@
+import os, queue, threading, time
+from typing import Any, Callable, Iterable, List, Optional
+
+# items buffered between two stages; bounds memory when one side is slower
+INDEX_QUEUE_DEPTH = int(os.getenv("INDEX_QUEUE_DEPTH", "64"))
+
+_DONE = object()
+
+class Stage:
+    """One step of a Pipeline: `fn(item)` yields items for the next stage.
+
+    Runs in `threads` threads fed by a bounded queue. An exception from `fn`
+    is logged and the item skipped, unless the stage is `fatal` (the sink),
+    in which case the whole pipeline stops and run() re-raises it.
+    """
+
+    def __init__(self, name: str, fn: Callable[[Any], Optional[Iterable[Any]]], threads: int = 1,
+                 depth: int = INDEX_QUEUE_DEPTH, fatal: bool = False):
+        self.name = name
+        self.fn = fn
+        self.threads = max(threads, 1)
+        self.fatal = fatal
+        self.inbox: "queue.Queue" = queue.Queue(maxsize=max(depth, 1))
+        self.items = 0
+        self.outputs = 0
+        self.errors = 0
+        self.busy = 0.0      # seconds spent in fn, summed over threads
+        self.blocked = 0.0   # seconds waiting on a full downstream queue
+        self._lock = threading.Lock()
+
+    def _count(self, items: int = 0, outputs: int = 0, errors: int = 0, busy: float = 0.0, blocked: float = 0.0):
+        with self._lock:
+            self.items += items
+            self.outputs += outputs
+            self.errors += errors
+            self.busy += busy
+            self.blocked += blocked
+
+class Pipeline:
+    """Generator source -> stages -> ..., each stage in its own threads.
+
+    Stages are connected by bounded queues, so a slow sink backs up into
+    parsing and scanning instead of buffering everything, while disk reads,
+    parsing and network writes overlap.
+    """
+
+    def __init__(self, tag: str, stages: List[Stage]):
+        self.tag = tag
+        self.stages = stages
+        self.source = Stage("scan", None)
+        self.elapsed = 0.0
+        self._stop = threading.Event()
+        self._failure: Optional[BaseException] = None
+
+    @staticmethod
+    def _put(nxt: Stage, item) -> float:
+        """Hand an item downstream; return the seconds spent waiting for room."""
+        t0 = time.perf_counter()
+        nxt.inbox.put(item)
+        return time.perf_counter() - t0
+
+    def _feed(self, source: Iterable[Any]):
+        nxt = self.stages[0]
+        try:
+            it = iter(source)
+            while not self._stop.is_set():
+                t0 = time.perf_counter()
+                try:
+                    item = next(it)
+                except StopIteration:
+                    break
+                finally:
+                    self.source._count(busy=time.perf_counter() - t0)
+                self.source._count(items=1, outputs=1, blocked=self._put(nxt, item))
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            for _ in range(nxt.threads):
+                nxt.inbox.put(_DONE)
+
+    def _fail(self, e: BaseException):
+        if self._failure is None:
+            self._failure = e
+        self._stop.set()
+
+    def _work(self, i: int, live: List[int], lock: threading.Lock):
+        stage = self.stages[i]
+        nxt = self.stages[i + 1] if i + 1 < len(self.stages) else None
+        while True:
+            item = stage.inbox.get()
+            if item is _DONE:
+                break
+            if self._stop.is_set():
+                # drain so upstream puts never block
+                continue
+            t0 = time.perf_counter()
+            outputs = errors = 0
+            blocked = 0.0
+            try:
+                for out in stage.fn(item) or ():
+                    outputs += 1
+                    if nxt is not None:
+                        blocked += self._put(nxt, out)
+            except Exception as e:
+                errors = 1
+                if stage.fatal:
+                    self._fail(e)
+                else:
+                    print(f"[{self.tag}] {stage.name} error: {e}")
+            stage._count(items=1, outputs=outputs, errors=errors,
+                         busy=time.perf_counter() - t0 - blocked, blocked=blocked)
+        with lock:
+            live[i] -= 1
+            last = live[i] == 0
+        if last and nxt is not None:
+            for _ in range(nxt.threads):
+                nxt.inbox.put(_DONE)
+
+    def run(self, source: Iterable[Any]):
+        """Push every source item through the stages; returns when all are drained."""
+        t0 = time.perf_counter()
+        live = [s.threads for s in self.stages]
+        lock = threading.Lock()
+        threads = [threading.Thread(target=self._feed, args=(source,), name=f"{self.tag}-scan", daemon=True)]
+        for i, stage in enumerate(self.stages):
+            threads += [threading.Thread(target=self._work, args=(i, live, lock),
+                                         name=f"{self.tag}-{stage.name}-{n}", daemon=True)
+                        for n in range(stage.threads)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.elapsed += time.perf_counter() - t0
+        if self._failure is not None:
+            raise self._failure
+
+    def report(self):
+        wall = max(self.elapsed, 1e-9)
+        for stage in [self.source] + self.stages:
+            print(f"[{self.tag}] {stage.name:<7} {stage.items} in, {stage.outputs} out, {stage.errors} errors, "
+                  f"{stage.items / wall:.1f}/s, busy {stage.busy:.1f}s, blocked {stage.blocked:.1f}s "
+                  f"(x{stage.threads})")
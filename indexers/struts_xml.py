@@ -1,61 +1,85 @@
 import os
-from pathlib import Path
 import xml.etree.ElementTree as ET
-from retrievers.pipeline import upsert
+from typing import Dict, Any, List
+from .manifest import blob_sha
+from .webpaths import resolve
 
-def _norm_jsp(p: str) -> str:
-    p = (p or "").strip()
-    if not p:
-        return p
-    if not p.startswith("/"):
-        p = "/" + p
-    return p.replace("\\","/")
+STRUTS_GLOBS = ("struts*.xml", "struts-config*.xml")
+# Struts 1 targets; a path without a leading "/" names a tiles definition
+STRUTS1_TYPES = ("forward", "include", "input")
 
 def _action_to_id(repo: str, name_or_path: str) -> str:
     return f"struts:{repo}:{name_or_path}"
 
-def index_repo_struts(root: str):
-    rootp = Path(root)
-    repo = rootp.name
-    for xml in list(rootp.rglob("struts*.xml")) + list(rootp.rglob("struts-config*.xml")):
-        try:
-            tree = ET.parse(xml)
-            x = tree.getroot()
-            txt = xml.read_text(errors="ignore")
+def _targets(act: ET.Element) -> List[Dict[str, str]]:
+    """Struts 2 <result>s and Struts 1 <forward>s / forward= / input=."""
+    out = []
+    for r in act.findall("result"):
+        loc = (r.text or "").strip()
+        if not loc:
+            loc = next(((p.text or "").strip() for p in r.findall("param") if p.get("name") == "location"), "")
+        if loc:
+            out.append({"name": r.get("name") or "success", "type": r.get("type") or "dispatcher", "path": loc})
+    for f in act.findall("forward"):
+        if f.get("path"):
+            out.append({"name": f.get("name") or "", "type": "forward", "path": f.get("path")})
+    for attr in ("forward", "include", "input"):
+        if act.get(attr):
+            out.append({"name": attr, "type": attr, "path": act.get(attr)})
+    return out
 
-            # Struts 2: <action name="x"><result>/a.jsp</result></action>
-            for act in x.findall(".//action"):
-                name = act.get("name") or act.get("path") or act.get("value") or ""
-                action_path = name
-                if name and not name.startswith("/"):
-                    action_path = f"/{name}.action"
-                results = [ (r.text or "").strip() for r in act.findall("result") if r.text ]
-                upsert({ 
-                    "id": _action_to_id(repo, action_path),
-                    "kind": "StrutsAction",
-                    "repo": repo,
-                    "path": action_path,
-                    "action_name": name,
-                    "sha": "<fs>",
-                    "source_env": os.getenv("SOURCE_ENV","legacy"),
-                    "text": txt[:8000],
-                    "anchors": [name or action_path],
-                })
-            # Struts 1: <action path="/foo" forward="/bar.jsp"><forward .../></action>
-            for act in x.findall(".//action-mappings/action") + x.findall(".//action"):
-                path = act.get("path")
-                if not path: 
-                    continue
-                upsert({
-                    "id": _action_to_id(repo, path),
-                    "kind": "StrutsAction",
-                    "repo": repo,
-                    "path": path,
-                    "action_name": path,
-                    "sha": "<fs>",
-                    "source_env": os.getenv("SOURCE_ENV","legacy"),
-                    "text": txt[:8000],
-                    "anchors": [path],
-                })
-        except Exception as e:
-            print(f"[struts_xml] error {xml}: {e}")
+def parse_struts(repo: str, rel: str, data: bytes) -> List[Dict[str, Any]]:
+    """One doc per <action>, carrying its own element and resolved JSP/tiles edges.
+
+    Struts 1 actions are keyed by path= ("/foo"), Struts 2 ones by package
+    namespace + name= ("/ns/foo.action").
+    """
+    x = ET.fromstring(data)
+    sha = blob_sha(data)
+    namespace_of = {}
+    for pkg in x.iter("package"):
+        for act in pkg.findall("action"):
+            namespace_of[act] = pkg.get("namespace") or ""
+
+    docs: Dict[str, Dict[str, Any]] = {}
+    for act in x.iter("action"):
+        namespace = namespace_of.get(act, "")
+        if act.get("path"):
+            # Struts 1: <action path="/foo" type="..."><forward path="/bar.jsp"/></action>
+            name = action_path = act.get("path")
+        else:
+            # Struts 2: <package namespace="/ns"><action name="x"><result>/a.jsp</result></action>
+            name = act.get("name") or act.get("value") or ""
+            if not name:
+                continue
+            action_path = name if name.startswith("/") else f"{namespace.rstrip('/')}/{name}.action"
+        results = _targets(act)
+        edges = []
+        for r in results:
+            target = r["path"].split("?", 1)[0]
+            if target.endswith((".jsp", ".jspf")):
+                # forwards are context-relative even without a leading "/"
+                jsp_rel = resolve(rel, target, relative_to_file=False)
+                edges.append({"type": "FORWARDS_TO", "target": f"jsp:{repo}:{jsp_rel}",
+                              "path": "/" + jsp_rel, "name": r["name"]})
+            elif r["type"] == "tiles" or (r["type"] in STRUTS1_TYPES and target and not target.startswith("/")):
+                edges.append({"type": "FORWARDS_TO", "target": f"tiles:{repo}:{target}",
+                              "path": target, "name": r["name"]})
+        action_class = act.get("type") or act.get("class") or ""
+        docs[action_path] = {
+            "id": _action_to_id(repo, action_path),
+            "kind": "StrutsAction",
+            "repo": repo,
+            "path": action_path,
+            "action_name": name,
+            "namespace": namespace,
+            "action_class": action_class,
+            "config": "/" + rel,
+            "results": results,
+            "edges": edges,
+            "sha": sha,
+            "source_env": os.getenv("SOURCE_ENV","legacy"),
+            "text": ET.tostring(act, encoding="unicode").strip(),
+            "anchors": sorted({a for a in [name, action_path, action_class] + [r["path"] for r in results] if a}),
+        }
+    return list(docs.values())
@@ -0,0 +1,55 @@
+import os
+import xml.etree.ElementTree as ET
+from typing import Dict, Any, List, Optional
+from .manifest import blob_sha
+from .webpaths import resolve
+
+TILES_GLOBS = ("tiles*.xml",)
+
+def _jsp_edge(repo: str, rel: str, edge_type: str, target: str, name: str) -> Optional[Dict[str, Any]]:
+    target = (target or "").strip()
+    if not target.split("?", 1)[0].endswith((".jsp", ".jspf")):
+        return None
+    path = resolve(rel, target, relative_to_file=False)
+    return {"type": edge_type, "target": f"jsp:{repo}:{path}", "path": "/" + path, "name": name}
+
+def parse_tiles(repo: str, rel: str, data: bytes) -> List[Dict[str, Any]]:
+    """One doc per Tiles 1/2 <definition> with template, extends and put edges."""
+    x = ET.fromstring(data)
+    sha = blob_sha(data)
+    docs = []
+    for d in x.iter("definition"):
+        name = d.get("name")
+        if not name:
+            continue
+        edges = []
+        template = d.get("path") or d.get("template") or ""
+        e = _jsp_edge(repo, rel, "USES_TEMPLATE", template, "template")
+        if e:
+            edges.append(e)
+        if d.get("extends"):
+            edges.append({"type": "EXTENDS", "target": f"tiles:{repo}:{d.get('extends')}",
+                          "path": d.get("extends"), "name": "extends"})
+        puts = []
+        for p in list(d.iter("put")) + list(d.iter("put-attribute")):
+            value = p.get("value") or (p.text or "").strip()
+            puts.append({"name": p.get("name") or "", "value": value})
+            e = _jsp_edge(repo, rel, "INCLUDES", value, p.get("name") or "")
+            if e:
+                edges.append(e)
+        docs.append({
+            "id": f"tiles:{repo}:{name}",
+            "kind": "TilesDefinition",
+            "repo": repo,
+            "path": name,
+            "template": template,
+            "extends": d.get("extends") or "",
+            "config": "/" + rel,
+            "puts": puts,
+            "edges": edges,
+            "sha": sha,
+            "source_env": os.getenv("SOURCE_ENV","legacy"),
+            "text": ET.tostring(d, encoding="unicode").strip(),
+            "anchors": sorted({a for a in [name, template, d.get("extends")] + [p["value"] for p in puts] if a}),
+        })
+    return docs
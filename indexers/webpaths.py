@@ -0,0 +1,38 @@
+import posixpath
+
+# directories that mark a webapp root in common layouts, most specific first
+WEB_ROOT_MARKERS = ("src/main/webapp", "WebContent", "WebRoot", "webapp", "web")
+
+def web_root(rel: str) -> str:
+    """Repo-relative web root for a file inside a webapp ("" = repo root)."""
+    if "WEB-INF/" in rel:
+        return rel.split("WEB-INF/", 1)[0].rstrip("/")
+    if "src/main/resources" in rel:
+        # Struts 2 / Tiles configs on the classpath of a Maven webapp
+        return rel.split("src/main/resources", 1)[0] + "src/main/webapp"
+    for marker in WEB_ROOT_MARKERS:
+        if rel.startswith(marker + "/"):
+            return marker
+        if "/" + marker + "/" in rel:
+            return rel.split("/" + marker + "/", 1)[0] + "/" + marker
+    return ""
+
+def web_path(path: str) -> str:
+    """Context-relative path of a webapp file ("/WEB-INF/jsp/x.jsp"), as Struts configs name it."""
+    rel = path.lstrip("/")
+    root = web_root(rel)
+    return "/" + rel[len(root):].lstrip("/") if root else "/" + rel
+
+def resolve(rel: str, target: str, relative_to_file: bool = True) -> str:
+    """Repo-relative path of a webapp reference found in file `rel`.
+
+    "/x.jsp" is context-relative (joined to the web root); anything else is
+    relative to the referencing file's directory, or to the web root when
+    `relative_to_file` is False (Struts forwards). Query strings are dropped.
+    """
+    target = target.strip().replace("\\", "/").split("?", 1)[0].split("#", 1)[0]
+    if target.startswith("/") or not relative_to_file:
+        base = web_root(rel)
+    else:
+        base = posixpath.dirname(rel)
+    return posixpath.normpath(posixpath.join(base, target.lstrip("/"))).lstrip("/")
@@ -55,7 +55,8 @@ class AnswerAgent(Agent):
         for i, hit in enumerate(hits[:5]):
             repo = hit.get("repo", "unknown")
             path = hit.get("path", hit.get("id", "unknown"))
-            text_preview = hit.get("text", "")[:200] + "..." if len(hit.get("text", "")) > 200 else hit.get("text", "")
+            text = " ... ".join(hit.get("highlights") or []) or hit.get("text", "")
+            text_preview = text[:200] + "..." if len(text) > 200 else text
             evidence_lines.append(f"{i+1}. {repo}:{path}")
             evidence_lines.append(f"   {text_preview}")
             evidence_lines.append("")
@@ -0,0 +1,158 @@
+import json, time, asyncio
+from contextlib import contextmanager
+from typing import List, Dict, Any, Iterable, Optional
+
+SEARCH_FIELDS = ["id","kind","repo","path","sha","source_env","text","symbol","start_line","end_line","parent","chunk_no"]
+SEARCH_OPTION_KEYS = ("size", "from", "search_after", "fields", "highlight")
+
+class BulkWriter:
+    """Buffered bulk sink shared by all backends.
+
+    Index and delete ops are batched by count and payload size and handed to
+    `_send()`. `_begin()`/`_finish()` bracket the load (e.g. to suspend
+    refresh); per-item failures are collected in `errors` instead of aborting
+    the load.
+    """
+
+    def __init__(self, index: str, max_docs: int, max_bytes: int):
+        self.index = index
+        self.max_docs = max_docs
+        self.max_bytes = max_bytes
+        self.sent = 0
+        self.deleted = 0
+        self.errors: List[Dict[str, Any]] = []
+        self._batch: List[tuple] = []
+        self._bytes = 0
+
+    def __enter__(self) -> "BulkWriter":
+        self._begin()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.flush()
+        finally:
+            self._finish()
+        return False
+
+    def add(self, doc: Dict[str, Any]):
+        if "parent" not in doc:
+            # unchunked docs are their own parent; search collapses on it
+            doc = {**doc, "parent": doc["id"]}
+        source = json.dumps(doc, default=str)
+        self._queue(("index", doc["id"], doc, source), len(source) + len(doc["id"]) + 64)
+
+    def delete(self, doc_id: str):
+        self._queue(("delete", doc_id, None, None), len(doc_id) + 64)
+
+    def extend(self, docs: Iterable[Dict[str, Any]]):
+        for doc in docs:
+            self.add(doc)
+
+    def _queue(self, op: tuple, size: int):
+        if self._batch and (len(self._batch) >= self.max_docs or self._bytes + size > self.max_bytes):
+            self.flush()
+        self._batch.append(op)
+        self._bytes += size
+
+    def flush(self):
+        if not self._batch:
+            return
+        batch, self._batch, self._bytes = self._batch, [], 0
+        failed = self._send(batch)
+        self.errors.extend(failed)
+        failed_ids = {f["id"] for f in failed}
+        for action, doc_id, _, _ in batch:
+            if doc_id in failed_ids:
+                continue
+            if action == "delete":
+                self.deleted += 1
+            else:
+                self.sent += 1
+
+    def report(self, tag: str):
+        print(f"[{tag}] bulk: {self.sent} docs indexed, {self.deleted} deleted, {len(self.errors)} failed")
+        for err in self.errors[:10]:
+            print(f"[{tag}]   {err['id']}: {err['status']} {err['error']}")
+
+    def _begin(self):
+        pass
+
+    def _finish(self):
+        pass
+
+    def _send(self, batch: List[tuple]) -> List[Dict[str, Any]]:
+        """Apply (action, id, doc, json_source) ops, action being "index" or
+        "delete"; return {id, status, error} per failure."""
+        raise NotImplementedError
+
+class SearchBackend:
+    """Storage/retrieval interface behind retrievers.pipeline.
+
+    `index` arguments name a physical index (OpenSearch) or table (SQLite);
+    None means the live one. `generation()` returns a stamp that changes
+    whenever ingestion completes, used to key the result cache.
+    """
+
+    name = "base"
+    _index_ready = False
+
+    @property
+    def index_ready(self) -> bool:
+        """True once ensure_index() has run in this process."""
+        return self._index_ready
+
+    def ensure_index(self):
+        raise NotImplementedError
+
+    def upsert(self, doc: Dict[str, Any]):
+        raise NotImplementedError
+
+    def bulk_writer(self, index: Optional[str] = None, **kw) -> BulkWriter:
+        raise NotImplementedError
+
+    def delete_prefix(self, prefix: str) -> int:
+        """Delete live docs whose id starts with `prefix`; return how many."""
+        raise NotImplementedError
+
+    @contextmanager
+    def rebuild(self, replace_repos: Optional[List[str]] = None):
+        """Yield a fresh index name; make it live if the block succeeds.
+
+        Docs of repos not in `replace_repos` are copied from the live index
+        first; None copies nothing.
+        """
+        raise NotImplementedError
+        yield
+
+    def search(self, query: str, opts: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    async def async_search(self, query: str, opts: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(self.search, query, opts)
+
+    def search_profiled(self, query: str, opts: Optional[Dict[str, Any]] = None) -> tuple:
+        """Like search(), plus a timing breakdown dict. Backends refine it."""
+        t0 = time.perf_counter()
+        hits = self.search(query, opts)
+        return hits, {"backend": self.name,
+                      "timings_ms": {"search": round((time.perf_counter() - t0) * 1000, 3)}}
+
+    def find_paths(self, fragment: str, kinds: Optional[List[str]] = None, size: int = 20) -> List[Dict[str, Any]]:
+        """Docs whose repo or web path is under a "/dir" prefix, or whose path
+        contains a name part."""
+        raise NotImplementedError
+
+    def generation(self):
+        raise NotImplementedError
+
+    def index_identity(self) -> str:
+        """Id of the live physical index, unchanged by writes but not by a
+        rebuild or a fresh store; indexer manifests are tied to it."""
+        raise NotImplementedError
+
+    async def async_generation(self):
+        return await asyncio.to_thread(self.generation)
+
+    async def aclose(self):
+        pass
@@ -0,0 +1,499 @@
+import os, json, time
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional
+from .base import BulkWriter, SearchBackend, SEARCH_FIELDS
+
+OS_URL = os.getenv("OPENSEARCH_URL", "http://opensearch:9200")
+OS_INDEX = os.getenv("OS_INDEX", "traceit_docs")
+OS_REPLICAS = int(os.getenv("OS_REPLICAS", "0"))
+OS_KEEP_INDEXES = int(os.getenv("OS_KEEP_INDEXES", "2"))
+OS_POOL_MAXSIZE = int(os.getenv("OS_POOL_MAXSIZE", "100"))
+SEARCH_CACHE_GEN_CHECK = float(os.getenv("SEARCH_CACHE_GEN_CHECK", "5"))
+SEARCH_MAX_SIZE = int(os.getenv("SEARCH_MAX_SIZE", "100"))
+BULK_MAX_DOCS = int(os.getenv("OS_BULK_MAX_DOCS", "1000"))
+BULK_MAX_BYTES = int(os.getenv("OS_BULK_MAX_BYTES", str(8 * 1024 * 1024)))
+
+# Identifiers such as contractOptions.specifiedAmount are kept whole and also
+# split on case changes, dots, underscores and digits; paths get a hierarchy
+# subfield for directory-prefix term lookups and an edge-ngram subfield for
+# part-of-filename lookups.
+INDEX_ANALYSIS = {
+    "analyzer": {
+        "code": {"type": "custom", "tokenizer": "code_tokens",
+                 "filter": ["code_parts", "lowercase"]},
+        "path_tree": {"type": "custom", "tokenizer": "path_tree"},
+        "path_prefix": {"type": "custom", "tokenizer": "path_segments",
+                        "filter": ["code_parts", "lowercase", "path_edge"]},
+        "path_search": {"type": "custom", "tokenizer": "path_segments",
+                        "filter": ["code_parts", "lowercase"]},
+    },
+    "tokenizer": {
+        "code_tokens": {"type": "pattern", "pattern": "[^\\w.$]+"},
+        "path_tree": {"type": "path_hierarchy", "delimiter": "/"},
+        "path_segments": {"type": "pattern", "pattern": "[/.\\s-]+"},
+    },
+    "filter": {
+        "code_parts": {"type": "word_delimiter", "preserve_original": True,
+                       "split_on_case_change": True, "split_on_numerics": True,
+                       "stem_english_possessive": False},
+        "path_edge": {"type": "edge_ngram", "min_gram": 2, "max_gram": 30},
+    },
+}
+
+INDEX_MAPPING = {
+    "properties": {
+        "id": {"type": "keyword"},
+        "kind": {"type": "keyword"},
+        "repo": {"type": "keyword"},
+        "path": {"type": "keyword", "fields": {
+            "tree": {"type": "text", "analyzer": "path_tree", "search_analyzer": "keyword"},
+            "parts": {"type": "text", "analyzer": "path_prefix", "search_analyzer": "path_search"},
+        }},
+        # context-relative path of webapp files, as Struts and Tiles configs name them
+        "web_path": {"type": "keyword", "fields": {
+            "tree": {"type": "text", "analyzer": "path_tree", "search_analyzer": "keyword"},
+        }},
+        "sha": {"type": "keyword"},
+        "symbol": {"type": "keyword", "fields": {
+            "parts": {"type": "text", "analyzer": "code"},
+        }},
+        "symbol_kind": {"type": "keyword"},
+        "parent": {"type": "keyword"},
+        "chunk_no": {"type": "integer"},
+        "start_line": {"type": "integer"},
+        "end_line": {"type": "integer"},
+        "calls": {"type": "keyword"},
+        "ref": {"type": "keyword"},
+        "commit": {"type": "keyword"},
+        # resolved include/tiles targets, so "which pages include X" is a term query
+        "includes": {"type": "keyword"},
+        # tables/views a PL/SQL unit or view touches ("which procs write X")
+        "object_type": {"type": "keyword"},
+        "reads": {"type": "keyword"},
+        "writes": {"type": "keyword"},
+        # parser-resolved relationships, read back by graphdb.load only
+        "results": {"type": "object", "enabled": False},
+        "puts": {"type": "object", "enabled": False},
+        "columns": {"type": "object", "enabled": False},
+        "edges": {"type": "object", "enabled": False},
+        "source_env": {"type": "keyword"},
+        "anchors": {"type": "keyword", "fields": {
+            "parts": {"type": "text", "analyzer": "code"},
+        }},
+        "text": {"type": "text", "fields": {
+            "code": {"type": "text", "analyzer": "code"},
+        }}
+    }
+}
+
+def _index_body(**settings) -> Dict[str, Any]:
+    index_settings = {"number_of_shards": 1, "number_of_replicas": OS_REPLICAS}
+    index_settings.update(settings)
+    return {"settings": {"index": index_settings, "analysis": INDEX_ANALYSIS},
+            "mappings": INDEX_MAPPING}
+
+def _new_index_name() -> str:
+    # OS_INDEX is the alias; physical indexes carry a sortable version stamp
+    return f"{OS_INDEX}_v{time.strftime('%Y%m%d%H%M%S')}"
+
+def build_query(query: str) -> Dict[str, Any]:
+    """Full-text query over text, identifier parts, anchors and path parts."""
+    return {
+        "bool": {
+            "should": [
+                {"match": {"text": {"query": query}}},
+                {"match": {"text.code": {"query": query}}},
+                {"terms": {"anchors": [a for a in query.split() if len(a) > 2]}},
+                {"match": {"anchors.parts": {"query": query}}},
+                {"match": {"path.parts": {"query": query, "boost": 0.5}}},
+            ]
+        }
+    }
+
+def build_path_query(fragment: str) -> Dict[str, Any]:
+    """Term lookup on the path subfields instead of a wildcard scan.
+
+    A fragment starting with "/" matches a file or everything under a
+    directory, by repo path ("/src/main/webapp/WEB-INF/jsp") or by
+    context-relative web path ("/WEB-INF/jsp") through the path_hierarchy
+    subfields; "loadedHead" or "summary" matches filename parts via path.parts.
+    """
+    fragment = fragment.strip()
+    if fragment.startswith("/"):
+        tree = fragment.rstrip("/") or "/"
+        return {"bool": {"should": [
+            {"term": {"path": fragment}},
+            {"term": {"path.tree": tree}},
+            {"term": {"web_path": fragment}},
+            {"term": {"web_path.tree": tree}},
+        ]}}
+    return {"match": {"path.parts": {"query": fragment, "operator": "and"}}}
+
+def _search_body(query: str, opts: Optional[Dict[str, Any]] = None, collapse: bool = False) -> Dict[str, Any]:
+    """Build the search request; `opts` trims what comes back.
+
+    With `collapse`, chunks of one file come back as a single hit (its best
+    chunk). OpenSearch rejects collapse together with search_after, so
+    search_after pages are not collapsed; use `from` to page collapsed hits.
+
+    Supported opts: `size` (capped at SEARCH_MAX_SIZE), `from`, `search_after`
+    (the `_sort` of the last hit of the previous page), `fields` (the _source
+    fields to return) and `highlight` (True or {"fragment_size", "fragments"})
+    which returns `highlights` fragments and drops `text` unless it is listed
+    in `fields`.
+    """
+    opts = opts or {}
+    body: Dict[str, Any] = {
+        "size": min(int(opts.get("size", 20)), SEARCH_MAX_SIZE),
+        "query": build_query(query),
+        "_source": list(opts.get("fields") or SEARCH_FIELDS)
+    }
+    if collapse and not opts.get("search_after"):
+        body["collapse"] = {"field": "parent"}
+    if not opts:
+        return body
+    # stable tie-break so from/search_after pages never overlap
+    body["sort"] = [{"_score": "desc"}, {"id": "asc"}]
+    if opts.get("search_after"):
+        body["search_after"] = list(opts["search_after"])
+    elif opts.get("from"):
+        body["from"] = int(opts["from"])
+    hl = opts.get("highlight")
+    if hl:
+        hl = hl if isinstance(hl, dict) else {}
+        body["highlight"] = {"fields": {"text": {
+            "fragment_size": int(hl.get("fragment_size", 150)),
+            "number_of_fragments": int(hl.get("fragments", 3)),
+        }}}
+        if not opts.get("fields"):
+            body["_source"] = [f for f in SEARCH_FIELDS if f != "text"]
+    return body
+
+def _collect_hits(res: Dict[str, Any]) -> List[Dict[str, Any]]:
+    out = []
+    for hit in res.get("hits",{}).get("hits",[]):
+        src = hit.get("_source",{})
+        if "highlight" in hit:
+            src["highlights"] = hit["highlight"].get("text", [])
+        if "sort" in hit:
+            src["_sort"] = hit["sort"]
+        out.append(src)
+    return out
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 3)
+
+def _profile_node(node: Dict[str, Any], depth: int = 0) -> Dict[str, Any]:
+    out = {
+        "type": node.get("type"),
+        "description": (node.get("description") or "")[:200],
+        "time_ms": _ms(node.get("time_in_nanos", 0) / 1e9),
+    }
+    if depth < 2 and node.get("children"):
+        out["children"] = [_profile_node(c, depth + 1) for c in node["children"]]
+    return out
+
+def _summarize_profile(profile: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Condense the OpenSearch profile API output to per-shard query timings."""
+    shards = []
+    for shard in (profile or {}).get("shards", []):
+        for search in shard.get("searches", []):
+            shards.append({
+                "shard": shard.get("id"),
+                "query": [_profile_node(q) for q in search.get("query", [])],
+                "rewrite_ms": _ms(search.get("rewrite_time", 0) / 1e9),
+                "collector_ms": sum(_ms(c.get("time_in_nanos", 0) / 1e9)
+                                    for c in search.get("collector", [])),
+            })
+        fetch = shard.get("fetch")
+        if fetch and shards:
+            shards[-1]["fetch_ms"] = _ms(fetch.get("time_in_nanos", 0) / 1e9)
+    return shards
+
+def _has_parents(mappings: Dict[str, Any]) -> bool:
+    # indexes created before chunking have no keyword `parent` on every doc
+    return bool(mappings) and all(
+        m.get("mappings", {}).get("properties", {}).get("parent", {}).get("type") == "keyword"
+        for m in mappings.values())
+
+def _generation_stamp(mappings: Dict[str, Any]):
+    # keyed by physical index, so an alias swap changes the stamp too
+    return tuple(sorted(
+        (idx, (m.get("mappings", {}).get("_meta") or {}).get("generation"))
+        for idx, m in mappings.items()))
+
+class OpenSearchBulkWriter(BulkWriter):
+    """`_bulk` writer; refresh is off while open and runs once on exit."""
+
+    def __init__(self, backend: "OpenSearchBackend", index: str,
+                 max_docs: int = BULK_MAX_DOCS, max_bytes: int = BULK_MAX_BYTES):
+        super().__init__(index, max_docs, max_bytes)
+        self.backend = backend
+        self._prev_refresh = None
+
+    def _begin(self):
+        client = self.backend.client
+        if self.index == OS_INDEX:
+            self.backend.ensure_index()
+        settings = client.indices.get_settings(index=self.index, name="index.refresh_interval")
+        for idx in settings.values():
+            self._prev_refresh = idx.get("settings", {}).get("index", {}).get("refresh_interval")
+        client.indices.put_settings(index=self.index, body={"index": {"refresh_interval": "-1"}})
+
+    def _finish(self):
+        client = self.backend.client
+        # None resets the setting to the cluster default
+        client.indices.put_settings(index=self.index,
+                                    body={"index": {"refresh_interval": self._prev_refresh}})
+        client.indices.refresh(index=self.index)
+        self.backend.bump_generation(self.index)
+
+    def _send(self, batch: List[tuple]) -> List[Dict[str, Any]]:
+        lines = []
+        for action, doc_id, _, source in batch:
+            lines.append(json.dumps({action: {"_index": self.index, "_id": doc_id}}))
+            if source is not None:
+                lines.append(source)
+        res = self.backend.client.bulk(body="\n".join(lines) + "\n")
+        failed = []
+        if res.get("errors"):
+            for item in res.get("items", []):
+                op = next(iter(item.values()), {})
+                # deleting an id that is already gone is not a failure
+                if op.get("error") and not (op.get("status") == 404 and "delete" in item):
+                    failed.append({"id": op.get("_id"), "status": op.get("status"), "error": op["error"]})
+        return failed
+
+class OpenSearchBackend(SearchBackend):
+    """OpenSearch behind the OS_INDEX alias.
+
+    Clients are created on first use, so importing the pipeline does not need
+    a reachable cluster.
+    """
+
+    name = "opensearch"
+
+    def __init__(self):
+        self._client = None
+        self._async_client = None
+        self._index_ready = False
+        self._generation = None
+        self._generation_checked = 0.0
+        self._collapse = False
+
+    @property
+    def client(self):
+        if self._client is None:
+            from opensearchpy import OpenSearch, RequestsHttpConnection
+            self._client = OpenSearch(
+                hosts=[OS_URL],
+                use_ssl=False,
+                verify_certs=False,
+                connection_class=RequestsHttpConnection,
+                timeout=30,
+            )
+        return self._client
+
+    @property
+    def async_client(self):
+        # one pooled aiohttp-backed client per process, created inside the running loop
+        if self._async_client is None:
+            from opensearchpy import AsyncOpenSearch, AIOHttpConnection
+            self._async_client = AsyncOpenSearch(
+                hosts=[OS_URL],
+                use_ssl=False,
+                verify_certs=False,
+                connection_class=AIOHttpConnection,
+                # AIOHttpConnection's pool size is `maxsize`; unknown kwargs are swallowed
+                maxsize=OS_POOL_MAXSIZE,
+                timeout=30,
+            )
+        return self._async_client
+
+    async def aclose(self):
+        if self._async_client is not None:
+            await self._async_client.close()
+            self._async_client = None
+
+    def ensure_index(self):
+        if self._index_ready:
+            return
+        if self.client.indices.exists(index=OS_INDEX):
+            # fields added to the mapping since the index was created; adding
+            # a field is allowed in place and a no-op when it already exists
+            self.client.indices.put_mapping(index=OS_INDEX, body={"properties": {
+                "web_path": INDEX_MAPPING["properties"]["web_path"]}})
+            self._index_ready = True
+            return
+        body = _index_body()
+        body["aliases"] = {OS_INDEX: {}}
+        self.client.indices.create(index=_new_index_name(), body=body)
+        self._index_ready = True
+
+    def upsert(self, doc: Dict[str, Any]):
+        self.ensure_index()
+        self.client.index(index=OS_INDEX, id=doc["id"], body={"parent": doc["id"], **doc}, refresh=True)
+        self.bump_generation()
+
+    def bulk_writer(self, index: Optional[str] = None, **kw) -> OpenSearchBulkWriter:
+        return OpenSearchBulkWriter(self, index or OS_INDEX, **kw)
+
+    def delete_prefix(self, prefix: str) -> int:
+        self.ensure_index()
+        res = self.client.delete_by_query(index=OS_INDEX, body={"query": {"prefix": {"id": prefix}}},
+                                          conflicts="proceed", refresh=True)
+        deleted = res.get("deleted", 0)
+        if deleted:
+            self.bump_generation()
+        return deleted
+
+    def _alias_targets(self) -> List[str]:
+        if not self.client.indices.exists_alias(name=OS_INDEX):
+            return []
+        return list(self.client.indices.get_alias(name=OS_INDEX).keys())
+
+    def swap_alias(self, new_index: str):
+        """Atomically point OS_INDEX at `new_index` and prune old versions."""
+        actions: List[Dict[str, Any]] = []
+        old = self._alias_targets()
+        if not old and self.client.indices.exists(index=OS_INDEX):
+            # pre-alias deployments have a concrete index named OS_INDEX
+            actions.append({"remove_index": {"index": OS_INDEX}})
+        for idx in old:
+            actions.append({"remove": {"index": idx, "alias": OS_INDEX}})
+        actions.append({"add": {"index": new_index, "alias": OS_INDEX}})
+        self.client.indices.update_aliases(body={"actions": actions})
+        self.bump_generation()
+        print(f"[pipeline] alias {OS_INDEX} -> {new_index}")
+        self.prune_indexes()
+
+    def prune_indexes(self, keep: int = OS_KEEP_INDEXES):
+        """Delete versioned indexes beyond the newest `keep`, never the live one."""
+        live = set(self._alias_targets())
+        versions = sorted(self.client.indices.get(index=f"{OS_INDEX}_v*").keys(), reverse=True)
+        for idx in versions[keep:]:
+            if idx not in live:
+                self.client.indices.delete(index=idx)
+                print(f"[pipeline] dropped old index {idx}")
+
+    @contextmanager
+    def rebuild(self, replace_repos: Optional[List[str]] = None):
+        """Build a fresh physical index and swap OS_INDEX onto it on success.
+
+        The new index is created with refresh off and no replicas, so bulk loads
+        run at full speed while the alias keeps serving the old one. On exit the
+        index is force-merged, its settings restored, and the alias swapped.
+        Docs of repos not in `replace_repos` (sources this rebuild does not
+        re-ingest) are copied across first; None copies nothing. On error the
+        new index is dropped.
+        """
+        client = self.client
+        name = _new_index_name()
+        client.indices.create(index=name, body=_index_body(refresh_interval="-1", number_of_replicas=0))
+        try:
+            yield name
+            if replace_repos is not None and client.indices.exists(index=OS_INDEX):
+                carry_over = {"bool": {"must_not": {"terms": {"repo": list(replace_repos)}}}}
+                # docs from before chunking get parent = id so collapse sees every doc
+                client.reindex(body={"source": {"index": OS_INDEX, "query": carry_over},
+                                     "dest": {"index": name},
+                                     "script": {"lang": "painless", "source":
+                                                "if (ctx._source.parent == null) { ctx._source.parent = ctx._source.id }"}},
+                               refresh=False, request_timeout=3600)
+            client.indices.forcemerge(index=name, max_num_segments=1, request_timeout=3600)
+            client.indices.put_settings(index=name, body={"index": {
+                "refresh_interval": None, "number_of_replicas": OS_REPLICAS}})
+            client.indices.refresh(index=name)
+        except BaseException:
+            client.indices.delete(index=name, ignore=[404])
+            raise
+        self.swap_alias(name)
+
+    # Generation stamp of the live index. Ingestion writes a fresh stamp into
+    # the index mapping's _meta when it completes; searchers re-read it at most
+    # every SEARCH_CACHE_GEN_CHECK seconds, so other processes' reindexes are
+    # noticed.
+    def bump_generation(self, index: str = OS_INDEX):
+        self.client.indices.put_mapping(index=index, body={"_meta": {"generation": time.time_ns()}})
+        self._generation = None
+
+    def index_identity(self) -> str:
+        self.ensure_index()
+        # index.uuid differs even when an index is recreated under the same name
+        settings = self.client.indices.get_settings(index=OS_INDEX, name="index.uuid")
+        uuids = sorted(f"{idx}/{s['settings']['index']['uuid']}" for idx, s in settings.items())
+        return f"{OS_URL}/{','.join(uuids)}"
+
+    def _generation_fresh(self) -> bool:
+        return (self._generation is not None
+                and time.monotonic() - self._generation_checked < SEARCH_CACHE_GEN_CHECK)
+
+    def _set_generation(self, mappings: Dict[str, Any]):
+        self._generation = _generation_stamp(mappings)
+        self._collapse = _has_parents(mappings)
+        self._generation_checked = time.monotonic()
+        return self._generation
+
+    def generation(self):
+        if self._generation_fresh():
+            return self._generation
+        return self._set_generation(self.client.indices.get_mapping(index=OS_INDEX))
+
+    async def async_generation(self):
+        if self._generation_fresh():
+            return self._generation
+        return self._set_generation(await self.async_client.indices.get_mapping(index=OS_INDEX))
+
+    def search(self, query: str, opts: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        self.generation()  # refreshes the collapse flag along with the stamp
+        res = self.client.search(index=OS_INDEX, body=_search_body(query, opts, self._collapse))
+        return _collect_hits(res)
+
+    async def async_search(self, query: str, opts: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        await self.async_generation()
+        res = await self.async_client.search(index=OS_INDEX, body=_search_body(query, opts, self._collapse))
+        return _collect_hits(res)
+
+    def search_profiled(self, query: str, opts: Optional[Dict[str, Any]] = None) -> tuple:
+        """Run the search with the profile API and split client-side time into
+        serialization, request (server + network) and deserialization."""
+        self.generation()
+        t0 = time.perf_counter()
+        body = _search_body(query, opts, self._collapse)
+        body["profile"] = True
+        payload = json.dumps(body).encode("utf-8")
+        t1 = time.perf_counter()
+        conn = self.client.transport.get_connection()
+        _, _, raw = conn.perform_request("POST", f"/{OS_INDEX}/_search", body=payload,
+                                         headers={"content-type": "application/json"})
+        t2 = time.perf_counter()
+        res = json.loads(raw)
+        t3 = time.perf_counter()
+        hits = _collect_hits(res)
+        t4 = time.perf_counter()
+        took = res.get("took", 0)
+        return hits, {
+            "backend": self.name,
+            "timings_ms": {
+                "serialize": _ms(t1 - t0),
+                "request": _ms(t2 - t1),
+                "deserialize": _ms(t3 - t2),
+                "postprocess": _ms(t4 - t3),
+            },
+            "server_took_ms": took,
+            "network_ms": round(max(_ms(t2 - t1) - took, 0.0), 3),
+            "request_bytes": len(payload),
+            "response_bytes": len(raw),
+            "shards": _summarize_profile(res.get("profile")),
+        }
+
+    def find_paths(self, fragment: str, kinds: Optional[List[str]] = None, size: int = 20) -> List[Dict[str, Any]]:
+        query = build_path_query(fragment)
+        if kinds:
+            query = {"bool": {"must": [query], "filter": [{"terms": {"kind": list(kinds)}}]}}
+        # one hit per file: Java files are indexed as several symbol docs
+        res = self.client.search(index=OS_INDEX, body={
+            "size": min(size, SEARCH_MAX_SIZE), "query": query,
+            "collapse": {"field": "path"},
+            "_source": ["id", "kind", "repo", "path"]})
+        return _collect_hits(res)
@@ -1,64 +1,170 @@
-import os
-from typing import List, Dict, Any
-from opensearchpy import OpenSearch, RequestsHttpConnection
+import os, json, time, threading, asyncio
+from collections import OrderedDict
+from typing import List, Dict, Any, Iterable, Optional
+from .base import BulkWriter, SearchBackend
+# re-exported: api.app validates request options against it
+from .base import SEARCH_OPTION_KEYS
 
-OS_URL = os.getenv("OPENSEARCH_URL", "http://opensearch:9200")
-OS_INDEX = os.getenv("OS_INDEX", "traceit_docs")
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "opensearch").lower()
+SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "512"))
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", "300"))
 
-_client = OpenSearch(
-    hosts=[OS_URL],
-    use_ssl=False,
-    verify_certs=False,
-    connection_class=RequestsHttpConnection,
-    timeout=30,
-)
+_backend: Optional[SearchBackend] = None
 
-def ensure_index():
-    if _client.indices.exists(index=OS_INDEX):
-        return
-    body = {
-        "settings": {
-            "index": {
-                "number_of_shards": 1,
-                "number_of_replicas": 0
-            }
-        },
-        "mappings": {
-            "properties": {
-                "id": {"type": "keyword"},
-                "kind": {"type": "keyword"},
-                "repo": {"type": "keyword"},
-                "path": {"type": "keyword"},
-                "sha": {"type": "keyword"},
-                "source_env": {"type": "keyword"},
-                "anchors": {"type": "keyword"},
-                "text": {"type": "text"}
-            }
-        }
-    }
-    _client.indices.create(index=OS_INDEX, body=body)
-
-def search(query: str) -> List[Dict[str, Any]]:
-    ensure_index()
-    q = {
-        "size": 20,
-        "query": {
-            "bool": {
-                "should": [
-                    {"match": {"text": {"query": query}}},
-                    {"terms": {"anchors": [a for a in query.split() if len(a) > 2]}},
-                ]
+def get_backend() -> SearchBackend:
+    """Return the process-wide backend selected by SEARCH_BACKEND."""
+    global _backend
+    if _backend is None:
+        if SEARCH_BACKEND == "sqlite":
+            from .sqlite_backend import SQLiteBackend
+            _backend = SQLiteBackend()
+        elif SEARCH_BACKEND == "opensearch":
+            from .opensearch_backend import OpenSearchBackend
+            _backend = OpenSearchBackend()
+        else:
+            raise ValueError(f"unknown SEARCH_BACKEND: {SEARCH_BACKEND}")
+    return _backend
+
+class QueryCache:
+    """Thread-safe LRU cache with per-entry TTL and hit/miss counters."""
+
+    def __init__(self, max_size: int = SEARCH_CACHE_SIZE, ttl: float = SEARCH_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data: "OrderedDict[Any, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                    self.evictions += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
             }
-        },
-        "_source": ["id","kind","repo","path","sha","source_env","text"]
-    }
-    res = _client.search(index=OS_INDEX, body=q)
-    out = []
-    for hit in res.get("hits",{}).get("hits",[]):
-        src = hit.get("_source",{})
-        out.append(src)
-    return out
+
+# Keys carry the backend's index generation stamp, which changes whenever
+# ingestion completes. A process sees its own writes at once; the OpenSearch
+# backend re-reads the stamp at most every SEARCH_CACHE_GEN_CHECK seconds
+# (5 by default), so after another process reindexes, cached results can be
+# served for up to that long.
+search_cache = QueryCache()
+
+def _cache_key(query: str, generation, opts: Optional[Dict[str, Any]] = None) -> tuple:
+    return (generation, " ".join(query.split()), json.dumps(opts or {}, sort_keys=True, default=str))
+
+def ensure_index():
+    get_backend().ensure_index()
+
+def index_generation():
+    return get_backend().generation()
+
+def index_identity() -> str:
+    """Id of the live physical index (see SearchBackend.index_identity)."""
+    return get_backend().index_identity()
+
+def search(query: str, opts: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    backend = get_backend()
+    backend.ensure_index()
+    key = _cache_key(query, backend.generation(), opts)
+    cached = search_cache.get(key)
+    if cached is not None:
+        return [dict(h) for h in cached]
+    out = backend.search(query, opts)
+    search_cache.put(key, out)
+    return [dict(h) for h in out]
+
+async def async_search(query: str, opts: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    backend = get_backend()
+    if not backend.index_ready:
+        await asyncio.to_thread(backend.ensure_index)
+    key = _cache_key(query, await backend.async_generation(), opts)
+    cached = search_cache.get(key)
+    if cached is not None:
+        return [dict(h) for h in cached]
+    out = await backend.async_search(query, opts)
+    search_cache.put(key, out)
+    return [dict(h) for h in out]
+
+def find_paths(fragment: str, kinds: Optional[List[str]] = None, size: int = 20) -> List[Dict[str, Any]]:
+    """Path prefix / filename-part lookup (id, kind, repo, path per hit)."""
+    backend = get_backend()
+    backend.ensure_index()
+    return backend.find_paths(fragment, kinds, size)
+
+async def close_async_client():
+    if _backend is not None:
+        await _backend.aclose()
+
+def search_profiled(query: str, opts: Optional[Dict[str, Any]] = None) -> tuple:
+    """search() with a latency breakdown. Never answers from the result
+    cache, but stores its hits there so a following search() is a hit."""
+    backend = get_backend()
+    t0 = time.perf_counter()
+    backend.ensure_index()
+    key = _cache_key(query, backend.generation(), opts)
+    hits, profile = backend.search_profiled(query, opts)
+    profile["total_ms"] = round((time.perf_counter() - t0) * 1000, 3)
+    profile["cache"] = "bypassed"
+    search_cache.put(key, hits)
+    return [dict(h) for h in hits], profile
+
+async def async_search_profiled(query: str, opts: Optional[Dict[str, Any]] = None) -> tuple:
+    # opt-in debug path: run on a worker thread with the sync client
+    return await asyncio.to_thread(search_profiled, query, opts)
 
 def upsert(doc: Dict[str, Any]):
-    ensure_index()
-    _client.index(index=OS_INDEX, id=doc["id"], body=doc, refresh=True)
+    """Write one doc and make it searchable at once. Each call bumps the
+    index generation; load more than one doc through bulk()/bulk_writer()."""
+    get_backend().upsert(doc)
+
+def bulk_writer(index: Optional[str] = None, **kw) -> BulkWriter:
+    """Open a buffered bulk sink on the live index (or a rebuild target)."""
+    return get_backend().bulk_writer(index, **kw)
+
+def delete_prefix(prefix: str) -> int:
+    """Delete live docs whose id starts with `prefix` (one-off cleanups)."""
+    return get_backend().delete_prefix(prefix)
+
+def bulk(docs: Iterable[Dict[str, Any]], index: Optional[str] = None) -> BulkWriter:
+    with bulk_writer(index) as w:
+        w.extend(docs)
+    return w
+
+def rebuild_index(replace_repos: Optional[List[str]] = None):
+    """Context manager yielding a fresh index that goes live on success."""
+    return get_backend().rebuild(replace_repos)
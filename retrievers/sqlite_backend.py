@@ -0,0 +1,311 @@
+import os, re, json, time, uuid, sqlite3, threading
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional
+from .base import BulkWriter, SearchBackend, SEARCH_FIELDS
+
+SQLITE_PATH = os.getenv("SQLITE_PATH", "traceit_index.db")
+SQLITE_TABLE = os.getenv("SQLITE_TABLE", "docs")
+SQLITE_ANCHOR_WEIGHT = float(os.getenv("SQLITE_ANCHOR_WEIGHT", "4.0"))
+SEARCH_MAX_SIZE = int(os.getenv("SEARCH_MAX_SIZE", "100"))
+BULK_MAX_DOCS = int(os.getenv("SQLITE_BULK_MAX_DOCS", "5000"))
+BULK_MAX_BYTES = int(os.getenv("SQLITE_BULK_MAX_BYTES", str(32 * 1024 * 1024)))
+
+TOKEN_RX = re.compile(r"\w+")
+IDENT_RX = re.compile(r"[A-Za-z_$][\w$.]*")
+PART_RX = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+")
+
+def identifier_parts(*values: str) -> List[str]:
+    """Split camelCase / dotted / snake_case identifiers into lowercase parts.
+
+    Mirrors the `code` analyzer of the OpenSearch mapping, since FTS5's
+    unicode61 tokenizer keeps `specifiedAmount` as a single token.
+    """
+    parts = set()
+    for value in values:
+        for ident in IDENT_RX.findall(value or ""):
+            pieces = PART_RX.findall(ident)
+            if len(pieces) > 1:
+                parts.update(p.lower() for p in pieces)
+    return sorted(parts)
+
+def _anchors_text(doc: Dict[str, Any]) -> str:
+    anchors = doc.get("anchors") or []
+    if isinstance(anchors, str):
+        anchors = [anchors]
+    return " ".join(str(a) for a in anchors)
+
+def _match_expr(query: str) -> str:
+    # quote every token so FTS5 operators in user input are taken literally
+    tokens = TOKEN_RX.findall(query)
+    tokens += [p for p in identifier_parts(query) if p not in tokens]
+    return " OR ".join(f'"{t}"' for t in tokens)
+
+def _path_match_expr(fragment: str) -> str:
+    tokens = TOKEN_RX.findall(fragment)
+    return " AND ".join(f'{{path parts}} : "{t}"*' for t in tokens)
+
+class SQLiteBulkWriter(BulkWriter):
+    """Batches docs into one transaction per flush."""
+
+    def __init__(self, backend: "SQLiteBackend", index: str,
+                 max_docs: int = BULK_MAX_DOCS, max_bytes: int = BULK_MAX_BYTES):
+        super().__init__(index, max_docs, max_bytes)
+        self.backend = backend
+
+    def _begin(self):
+        self.backend.ensure_index()
+        self.backend._create_table(self.index)
+
+    def _finish(self):
+        self.backend.bump_generation()
+
+    def _send(self, batch: List[tuple]) -> List[Dict[str, Any]]:
+        conn = self.backend.conn
+        failed = []
+        with conn:
+            for action, doc_id, doc, source in batch:
+                try:
+                    if action == "delete":
+                        self.backend._delete(conn, self.index, doc_id)
+                    else:
+                        self.backend._write(conn, self.index, doc, source)
+                except sqlite3.Error as e:
+                    failed.append({"id": doc_id, "status": "sqlite", "error": str(e)})
+        return failed
+
+class SQLiteBackend(SearchBackend):
+    """Embedded SQLite FTS5 index ranked with BM25.
+
+    Each index is a pair of tables: `<name>` holds the JSON doc keyed by id and
+    `<name>_fts` the FTS5 columns (text, anchors, identifier parts, path)
+    sharing its rowid. Anchor matches are boosted through the bm25() column
+    weight; the FTS prefix index makes path-part lookups cheap. The live table name
+    and the generation stamp are kept in `traceit_meta`, which lets rebuilds
+    swap tables the way the OpenSearch backend swaps its alias.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str = SQLITE_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._index_ready = False
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        # one connection per thread; WAL lets searches run while a load commits
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _meta(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        row = self.conn.execute("SELECT value FROM traceit_meta WHERE key=?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def _set_meta(self, conn: sqlite3.Connection, key: str, value: str):
+        conn.execute("INSERT INTO traceit_meta(key, value) VALUES (?,?) "
+                     "ON CONFLICT(key) DO UPDATE SET value=excluded.value", (key, value))
+
+    @property
+    def live(self) -> str:
+        return self._meta("live", SQLITE_TABLE)
+
+    def _create_table(self, table: str):
+        with self.conn as conn:
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {table} ("
+                         "rowid INTEGER PRIMARY KEY, id TEXT NOT NULL UNIQUE, "
+                         "repo TEXT, kind TEXT, path TEXT, web_path TEXT, doc TEXT NOT NULL)")
+            cols = [c[1] for c in conn.execute(f"PRAGMA table_info({table})")]
+            for col in ("path", "web_path"):
+                if col not in cols:
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN {col} TEXT")
+                    conn.execute(f"UPDATE {table} SET {col} = json_extract(doc, '$.{col}')")
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_repo ON {table}(repo)")
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_path ON {table}(path)")
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_web_path ON {table}(web_path)")
+            fts_cols = [c[1] for c in conn.execute(f"PRAGMA table_info({table}_fts)")]
+            if fts_cols and "parts" not in fts_cols:
+                # pre-analyzer layout: rebuild the FTS table from the stored docs
+                conn.execute(f"DROP TABLE {table}_fts")
+                fts_cols = []
+            conn.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {table}_fts "
+                         "USING fts5(text, anchors, parts, path, prefix='2 3 4')")
+            if not fts_cols:
+                for rowid, source in conn.execute(f"SELECT rowid, doc FROM {table}").fetchall():
+                    self._write_fts(conn, table, rowid, json.loads(source))
+
+    def _write_fts(self, conn: sqlite3.Connection, table: str, rowid: int, doc: Dict[str, Any]):
+        text, anchors, path = doc.get("text") or "", _anchors_text(doc), doc.get("path") or ""
+        conn.execute(f"INSERT INTO {table}_fts(rowid, text, anchors, parts, path) VALUES (?,?,?,?,?)",
+                     (rowid, text, anchors, " ".join(identifier_parts(text, anchors, path)), path))
+
+    def _write(self, conn: sqlite3.Connection, table: str, doc: Dict[str, Any], source: str):
+        rowid = conn.execute(
+            f"INSERT INTO {table}(id, repo, kind, path, web_path, doc) VALUES (?,?,?,?,?,?) "
+            "ON CONFLICT(id) DO UPDATE SET repo=excluded.repo, kind=excluded.kind, "
+            "path=excluded.path, web_path=excluded.web_path, doc=excluded.doc RETURNING rowid",
+            (doc["id"], doc.get("repo"), doc.get("kind"), doc.get("path"), doc.get("web_path"),
+             source)).fetchone()[0]
+        conn.execute(f"DELETE FROM {table}_fts WHERE rowid=?", (rowid,))
+        self._write_fts(conn, table, rowid, doc)
+
+    def _delete(self, conn: sqlite3.Connection, table: str, doc_id: str):
+        row = conn.execute(f"DELETE FROM {table} WHERE id=? RETURNING rowid", (doc_id,)).fetchone()
+        if row:
+            conn.execute(f"DELETE FROM {table}_fts WHERE rowid=?", (row[0],))
+
+    def ensure_index(self):
+        if self._index_ready:
+            return
+        with self.conn as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS traceit_meta (key TEXT PRIMARY KEY, value TEXT)")
+            # tells a deleted-and-recreated database apart from the old one
+            conn.execute("INSERT OR IGNORE INTO traceit_meta(key, value) VALUES ('instance', ?)",
+                         (uuid.uuid4().hex,))
+        self._create_table(self.live)
+        self._index_ready = True
+
+    def upsert(self, doc: Dict[str, Any]):
+        self.ensure_index()
+        with self.conn as conn:
+            self._write(conn, self.live, doc, json.dumps(doc, default=str))
+        self.bump_generation()
+
+    def bulk_writer(self, index: Optional[str] = None, **kw) -> SQLiteBulkWriter:
+        self.ensure_index()
+        return SQLiteBulkWriter(self, index or self.live, **kw)
+
+    def delete_prefix(self, prefix: str) -> int:
+        self.ensure_index()
+        table = self.live
+        with self.conn as conn:
+            ids = [r[0] for r in conn.execute(f"SELECT id FROM {table} WHERE substr(id, 1, ?) = ?",
+                                              (len(prefix), prefix))]
+            for doc_id in ids:
+                self._delete(conn, table, doc_id)
+        if ids:
+            self.bump_generation()
+        return len(ids)
+
+    @contextmanager
+    def rebuild(self, replace_repos: Optional[List[str]] = None):
+        """Load into a fresh table pair and make it live on success.
+
+        Docs of repos not in `replace_repos` are copied from the live table
+        before the swap; None copies nothing.
+        """
+        self.ensure_index()
+        old = self.live
+        name = f"{SQLITE_TABLE}_v{time.strftime('%Y%m%d%H%M%S')}"
+        self._create_table(name)
+        try:
+            yield name
+            with self.conn as conn:
+                if replace_repos is not None:
+                    marks = ",".join("?" * len(replace_repos))
+                    conn.execute(f"INSERT OR IGNORE INTO {name}(id, repo, kind, path, web_path, doc) "
+                                 f"SELECT id, repo, kind, path, web_path, doc FROM {old} "
+                                 f"WHERE repo IS NULL OR repo NOT IN ({marks})", replace_repos)
+                    conn.execute(f"INSERT INTO {name}_fts(rowid, text, anchors, parts, path) "
+                                 f"SELECT n.rowid, f.text, f.anchors, f.parts, f.path FROM {name} n "
+                                 f"JOIN {old} o ON o.id = n.id JOIN {old}_fts f ON f.rowid = o.rowid "
+                                 f"WHERE n.rowid NOT IN (SELECT rowid FROM {name}_fts)")
+                conn.execute(f"INSERT INTO {name}_fts({name}_fts) VALUES ('optimize')")
+                self._set_meta(conn, "live", name)
+                conn.execute(f"DROP TABLE IF EXISTS {old}_fts")
+                conn.execute(f"DROP TABLE IF EXISTS {old}")
+        except BaseException:
+            with self.conn as conn:
+                conn.execute(f"DROP TABLE IF EXISTS {name}_fts")
+                conn.execute(f"DROP TABLE IF EXISTS {name}")
+            raise
+        self.bump_generation()
+        print(f"[pipeline] sqlite live table -> {name}")
+
+    def bump_generation(self):
+        with self.conn as conn:
+            self._set_meta(conn, "generation", str(time.time_ns()))
+
+    def generation(self):
+        return (self.live, self._meta("generation"))
+
+    def index_identity(self) -> str:
+        self.ensure_index()
+        return f"{os.path.abspath(self.path)}:{self.live}:{self._meta('instance')}"
+
+    def search(self, query: str, opts: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """BM25 search, one hit per parent; honours the same opts as the OpenSearch backend."""
+        match = _match_expr(query)
+        if not match:
+            return []
+        opts = opts or {}
+        table = self.live
+        size = min(int(opts.get("size", 20)), SEARCH_MAX_SIZE)
+        fields = list(opts.get("fields") or SEARCH_FIELDS)
+        highlight = opts.get("highlight")
+        if highlight and not opts.get("fields"):
+            fields = [f for f in fields if f != "text"]
+
+        snippet = "NULL"
+        params: List[Any] = []
+        if highlight:
+            hl = highlight if isinstance(highlight, dict) else {}
+            # FTS5 snippets are sized in tokens (max 64); assume ~6 chars per token
+            tokens = max(1, min(64, int(hl.get("fragment_size", 150)) // 6))
+            snippet = f"snippet({table}_fts, 0, '<em>', '</em>', '...', {tokens})"
+        params.append(SQLITE_ANCHOR_WEIGHT)
+        params.append(match)
+        # best chunk per parent (file), then page over the collapsed hits
+        sql = (f"SELECT doc, id, score, hl FROM ("
+               f"SELECT *, row_number() OVER (PARTITION BY parent ORDER BY score DESC, id ASC) AS rank FROM ("
+               f"SELECT d.doc AS doc, d.id AS id, -bm25({table}_fts, 1.0, ?, 0.5, 0.5) AS score, {snippet} AS hl, "
+               f"COALESCE(json_extract(d.doc, '$.parent'), d.id) AS parent "
+               f"FROM {table}_fts JOIN {table} d ON d.rowid = {table}_fts.rowid "
+               f"WHERE {table}_fts MATCH ?)) WHERE rank = 1")
+        if opts.get("search_after"):
+            after_score, after_id = opts["search_after"][0], opts["search_after"][1]
+            sql += " AND (score < ? OR (score = ? AND id > ?))"
+            params.extend([after_score, after_score, after_id])
+        sql += " ORDER BY score DESC, id ASC LIMIT ? OFFSET ?"
+        params.extend([size, 0 if opts.get("search_after") else int(opts.get("from") or 0)])
+
+        out = []
+        for doc, doc_id, score, hl_text in self.conn.execute(sql, params):
+            src = json.loads(doc)
+            hit = {k: src[k] for k in fields if k in src}
+            if highlight:
+                hit["highlights"] = [hl_text] if hl_text else []
+            if opts:
+                hit["_sort"] = [score, doc_id]
+            out.append(hit)
+        return out
+
+    def find_paths(self, fragment: str, kinds: Optional[List[str]] = None, size: int = 20) -> List[Dict[str, Any]]:
+        table = self.live
+        fragment = fragment.strip()
+        if fragment.startswith("/"):
+            # file or directory prefix as index range scans on the repo path
+            # and the context-relative web path ("/WEB-INF/jsp")
+            prefix = fragment.rstrip("/") + "/"
+            sql = (f"SELECT id, kind, repo, path FROM {table} "
+                   "WHERE (path = ? OR (path >= ? AND path < ?) "
+                   "OR web_path = ? OR (web_path >= ? AND web_path < ?))")
+            params: List[Any] = [fragment, prefix, prefix[:-1] + "0"] * 2
+        else:
+            match = _path_match_expr(fragment)
+            if not match:
+                return []
+            sql = (f"SELECT d.id, d.kind, d.repo, d.path FROM {table}_fts "
+                   f"JOIN {table} d ON d.rowid = {table}_fts.rowid WHERE {table}_fts MATCH ?")
+            params = [match]
+        if kinds:
+            sql += f" AND kind IN ({','.join('?' * len(kinds))})"
+            params.extend(kinds)
+        # one row per file: Java files are indexed as several symbol docs
+        sql += " GROUP BY 4 LIMIT ?"
+        params.append(min(size, SEARCH_MAX_SIZE))
+        return [dict(zip(("id", "kind", "repo", "path"), row)) for row in self.conn.execute(sql, params)]
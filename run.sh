@@ -15,17 +15,20 @@ case "$cmd" in
   index)
     podman exec -it traceit-api python -m indexers.run --repos /app/config/repos.csv
     ;;
+  reindex)
+    podman exec -it traceit-api python -m indexers.run --repos /app/config/repos.csv --rebuild
+    ;;
   dbmeta)
     podman exec -it traceit-api python -c "from indexers import db_oracle as d; d.run()"
     ;;
   graphload)
-    podman exec -it traceit-api python /app/graphdb/load.py
+    podman exec -it traceit-api python -m graphdb.load
     ;;
   eval)
     podman exec -it traceit-api python /app/eval/run_eval.py --file /app/eval/golden.jsonl
     ;;
   *)
-    echo "Usage: ./run.sh {up|down|index|dbmeta|graphload|eval}"
+    echo "Usage: ./run.sh {up|down|index|reindex|dbmeta|graphload|eval}"
     exit 1
     ;;
 esac
@@ -7,6 +7,7 @@ Run this after starting the containers to get graph relationships working.
 import os
 import sys
 from neo4j import GraphDatabase
+from graphdb.schema import ensure_schema
 
 def setup_neo4j_schema():
     """Create basic schema and sample data for MVP."""
@@ -27,9 +28,7 @@ def setup_neo4j_schema():
             
             # Create constraints
             print("Creating constraints...")
-            session.run("CREATE CONSTRAINT action_name IF NOT EXISTS FOR (a:Action) REQUIRE a.name IS UNIQUE")
-            session.run("CREATE CONSTRAINT jsp_path IF NOT EXISTS FOR (j:JSP) REQUIRE j.path IS UNIQUE")
-            session.run("CREATE CONSTRAINT file_path IF NOT EXISTS FOR (f:File) REQUIRE f.path IS UNIQUE")
+            ensure_schema(driver)
             
             # Add sample Struts actions based on golden questions
             print("Adding sample Struts actions...")
@@ -128,12 +127,13 @@ def setup_neo4j_schema():
 
 def populate_sample_code_index():
     """Add some sample code documents to OpenSearch for testing."""
-    from retrievers.pipeline import upsert
+    from retrievers.pipeline import bulk
     
     print("Adding sample code documents to OpenSearch...")
+    docs = []
     
     # Sample JSP content for Universal Life
-    upsert({
+    docs.append({
         "id": "jsp_ul_header",
         "kind": "jsp",
         "repo": "legacy-web",
@@ -152,7 +152,7 @@ def populate_sample_code_index():
     })
     
     # Sample JSP with contract options
-    upsert({
+    docs.append({
         "id": "jsp_contract_options",
         "kind": "jsp", 
         "repo": "legacy-web",
@@ -193,7 +193,7 @@ def populate_sample_code_index():
     })
     
     # Sample Struts configuration
-    upsert({
+    docs.append({
         "id": "struts_summary_action",
         "kind": "xml",
         "repo": "legacy-web", 
@@ -221,7 +221,7 @@ def populate_sample_code_index():
     })
     
     # Sample Java action class
-    upsert({
+    docs.append({
         "id": "java_summary_action",
         "kind": "java",
         "repo": "legacy-web",
@@ -253,6 +253,8 @@ public class SummaryAction extends BaseAction {
 }"""
     })
     
+    # one bulk load refreshes and bumps the index generation once
+    bulk(docs).report("setup")
     print("Sample code documents added to OpenSearch!")
 
 if __name__ == "__main__":
@@ -0,0 +1,61 @@
+from retrievers.base import BulkWriter
+
+class RecordingWriter(BulkWriter):
+    """Keeps every batch handed to _send; ids in `fail` come back as failures."""
+
+    def __init__(self, max_docs=3, max_bytes=10_000, fail=()):
+        super().__init__("test", max_docs, max_bytes)
+        self.fail = set(fail)
+        self.calls = []
+        self.batches = []
+
+    def _begin(self):
+        self.calls.append("begin")
+
+    def _finish(self):
+        self.calls.append("finish")
+
+    def _send(self, batch):
+        self.calls.append("send")
+        self.batches.append([(action, doc_id) for action, doc_id, _, _ in batch])
+        return [{"id": doc_id, "status": 400, "error": "bad"} for _, doc_id, _, _ in batch if doc_id in self.fail]
+
+def test_batches_by_count_and_counts_results():
+    with RecordingWriter(max_docs=3, fail={"d4"}) as w:
+        w.extend({"id": f"d{i}", "text": "x"} for i in range(5))
+        w.delete("gone")
+    assert w.batches == [[("index", "d0"), ("index", "d1"), ("index", "d2")],
+                         [("index", "d3"), ("index", "d4"), ("delete", "gone")]]
+    assert w.calls == ["begin", "send", "send", "finish"]
+    assert (w.sent, w.deleted) == (4, 1)
+    assert w.errors == [{"id": "d4", "status": 400, "error": "bad"}]
+
+def test_batches_by_payload_size():
+    w = RecordingWriter(max_docs=100, max_bytes=500)
+    for i in range(4):
+        w.add({"id": f"d{i}", "text": "y" * 100})
+    w.flush()
+    assert [len(b) for b in w.batches] == [2, 2]
+    # a single op over the limit is still sent, on its own
+    w.add({"id": "big", "text": "z" * 1000})
+    w.add({"id": "small", "text": ""})
+    w.flush()
+    assert w.batches[2:] == [[("index", "big")], [("index", "small")]]
+
+def test_add_defaults_parent_to_id():
+    w = RecordingWriter()
+    w.add({"id": "a", "text": ""})
+    w.add({"id": "b~1", "parent": "b", "text": ""})
+    assert [op[2]["parent"] for op in w._batch] == ["a", "b"]
+
+def test_finish_runs_when_flush_fails():
+    class Broken(RecordingWriter):
+        def _send(self, batch):
+            raise ConnectionError("down")
+    w = Broken()
+    try:
+        with w:
+            w.add({"id": "a"})
+    except ConnectionError:
+        pass
+    assert w.calls == ["begin", "finish"]
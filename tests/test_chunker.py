@@ -0,0 +1,42 @@
+from indexers.chunker import windows, chunk_doc
+
+def _text(n):
+    return "\n".join(f"line {i}" for i in range(1, n + 1))
+
+def test_short_text_is_one_window():
+    assert windows("a\nb", max_lines=10) == [(1, 2, "a\nb")]
+
+def test_windows_overlap_and_cover_every_line():
+    wins = windows(_text(25), max_lines=10, max_chars=10_000, overlap=3)
+    assert [(s, e) for s, e, _ in wins] == [(1, 10), (8, 17), (15, 24), (22, 25)]
+    assert wins[1][2].split("\n")[0] == "line 8"
+
+def test_overlap_is_capped_at_half_a_window():
+    wins = windows(_text(12), max_lines=4, max_chars=10_000, overlap=10)
+    assert [(s, e) for s, e, _ in wins] == [(1, 4), (3, 6), (5, 8), (7, 10), (9, 12)]
+
+def test_char_budget_ends_windows_on_line_boundaries():
+    text = "\n".join("x" * 40 for _ in range(10))
+    wins = windows(text, max_lines=100, max_chars=100, overlap=0)
+    assert all(len(w) <= 100 for _, _, w in wins)
+    assert [(s, e) for s, e, _ in wins] == [(1, 2), (3, 4), (5, 6), (7, 8), (9, 10)]
+
+def test_long_lines_are_split_and_keep_their_line_number():
+    wins = windows("short\n" + "y" * 250, max_lines=100, max_chars=100, overlap=0)
+    assert [(s, e) for s, e, _ in wins] == [(1, 1), (2, 2), (2, 2), (2, 2)]
+    assert "".join(w for _, _, w in wins[1:]) == "y" * 250
+
+def test_chunk_doc_single_window_keeps_its_id():
+    assert chunk_doc({"id": "x", "text": "a\nb"}, first_line=7) == [
+        {"start_line": 7, "end_line": 8, "id": "x", "text": "a\nb", "parent": "x", "chunk_no": 0}]
+
+def test_chunk_doc_ids_and_absolute_lines(monkeypatch):
+    import indexers.chunker as chunker
+    monkeypatch.setattr(chunker, "windows",
+                        lambda text, _w=windows: _w(text, max_lines=10, max_chars=10_000, overlap=3))
+    doc = {"id": "code:r:/A.java#A.f()", "text": _text(25)}
+    chunks = chunk_doc(doc, first_line=100, parent="code:r:/A.java")
+    assert [c["id"] for c in chunks] == [f"{doc['id']}~{i}" for i in range(4)]
+    assert [c["chunk_no"] for c in chunks] == [0, 1, 2, 3]
+    assert [(c["start_line"], c["end_line"]) for c in chunks] == [(100, 109), (107, 116), (114, 123), (121, 124)]
+    assert {c["parent"] for c in chunks} == {"code:r:/A.java"}
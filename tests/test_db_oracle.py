@@ -0,0 +1,58 @@
+import datetime
+import pytest
+
+pytest.importorskip("oracledb")
+
+from indexers.db_oracle import harvest_owner
+
+DDL = datetime.datetime(2024, 1, 1)
+STAMP = f"ddl:{DDL.isoformat()}"
+
+class FakeCursor:
+    """Answers the dictionary-view queries harvest_owner issues from canned rows."""
+
+    def __init__(self, views):
+        self.views = views
+        self.rows = []
+
+    def execute(self, sql, **binds):
+        view = next(v for v in self.views if v in sql)
+        self.rows = self.views[view]
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def close(self):
+        pass
+
+class FakeConn:
+    def __init__(self, **views):
+        self.views = views
+
+    def cursor(self):
+        return FakeCursor(self.views)
+
+def _conn(columns, source):
+    return FakeConn(ALL_OBJECTS=[("T1", "TABLE", DDL), ("T2", "TABLE", DDL), ("V1", "VIEW", DDL),
+                                 ("P1", "PROCEDURE", DDL), ("P2", "PROCEDURE", DDL)],
+                    ALL_DEPENDENCIES=[("P1", "PROCEDURE", "APP", "T1", "TABLE")],
+                    ALL_VIEWS=[], ALL_TAB_COLUMNS=columns, ALL_SOURCE=source)
+
+def test_objects_without_visible_columns_or_source_still_yield_docs():
+    conn = _conn(columns=[("T1", "A", "NUMBER", 22, 10, 0, "N")],
+                 source=[("P1", "PROCEDURE", "procedure p1 is begin update t1 set a = 1; end;\n")])
+    out = {key: (stamp, docs) for key, stamp, docs in harvest_owner(conn, "APP")}
+    assert set(out) == {"TABLE:T1", "TABLE:T2", "VIEW:V1", "PROCEDURE:P1", "PROCEDURE:P2"}
+    assert {stamp for stamp, _ in out.values()} == {STAMP}
+    ids = {key: [d["id"] for d in docs] for key, (_, docs) in out.items()}
+    assert ids == {"TABLE:T1": ["dbtable:APP.T1"], "TABLE:T2": ["dbtable:APP.T2"], "VIEW:V1": ["view:APP.V1"],
+                   "PROCEDURE:P1": ["proc:APP.P1"], "PROCEDURE:P2": ["proc:APP.P2"]}
+    assert out["TABLE:T1"][1][0]["columns"][0]["name"] == "A"
+    assert out["TABLE:T2"][1][0]["columns"] == []
+    assert [e["type"] for e in out["PROCEDURE:P1"][1][0]["edges"]] == ["WRITES"]
+
+def test_unchanged_objects_yield_their_stamp_only():
+    known = {"TABLE:T1": STAMP, "TABLE:T2": STAMP, "VIEW:V1": STAMP, "PROCEDURE:P1": STAMP}
+    out = {key: docs for key, _, docs in harvest_owner(_conn([], []), "APP", known)}
+    assert {k for k, docs in out.items() if docs is None} == set(known)
+    assert [d["id"] for d in out["PROCEDURE:P2"]] == ["proc:APP.P2"]
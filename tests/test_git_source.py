@@ -0,0 +1,71 @@
+import os
+import shutil
+import subprocess
+import pytest
+
+from indexers.git_source import CatFile, ls_tree, resolve, tree_files
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="git not installed")
+
+PATTERNS = {"java": ["*.java"], "jsp": ["*.jsp"]}
+
+def git(repo, *args):
+    return subprocess.run(["git", "-C", str(repo), "-c", "user.name=t", "-c", "user.email=t@example.com",
+                           *args], check=True, stdout=subprocess.PIPE).stdout.decode().strip()
+
+def write(repo, rel, text):
+    path = repo / rel
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+
+@pytest.fixture
+def repo(tmp_path):
+    """main: A.java, web/index.jsp, a symlink and a submodule entry;
+    feature: A.java changed, B.java added, index.jsp deleted."""
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    git(repo, "init", "-q", "-b", "main")
+    write(repo, "src/A.java", "class A {}")
+    write(repo, "web/index.jsp", "<p/>")
+    write(repo, "target/Gen.java", "class Gen {}")
+    os.symlink("A.java", repo / "src" / "Link.java")
+    git(repo, "add", "-A")
+    # a gitlink, as `git submodule add` records it, without cloning anything
+    git(repo, "update-index", "--add", "--cacheinfo", f"160000,{'1' * 40},lib/Sub.java")
+    git(repo, "commit", "-q", "-m", "main")
+    git(repo, "checkout", "-q", "-b", "feature")
+    write(repo, "src/A.java", "class A { int x; }")
+    write(repo, "src/B.java", "class B {}")
+    git(repo, "rm", "-q", "web/index.jsp")
+    git(repo, "add", "-A")
+    git(repo, "commit", "-q", "-m", "feature")
+    return repo
+
+def test_ls_tree_skips_symlinks_and_submodules(repo):
+    paths = [p for p, _ in ls_tree(str(repo), resolve(str(repo), "main"))]
+    assert paths == ["src/A.java", "target/Gen.java", "web/index.jsp"]
+
+def test_tree_files_unions_refs(repo):
+    commits = {ref: resolve(str(repo), ref) for ref in ("main", "feature")}
+    files = list(tree_files(str(repo), commits, PATTERNS))
+    assert [(name, path, sorted(refs)) for name, path, refs in files] == [
+        ("java", "src/A.java", ["feature", "main"]),
+        ("java", "src/B.java", ["feature"]),
+        ("jsp", "web/index.jsp", ["main"]),
+    ]
+    blobs = files[0][2]
+    assert blobs["main"] != blobs["feature"]
+    with CatFile(str(repo)) as cat:
+        assert cat.read(blobs["main"]) == b"class A {}"
+        assert cat.read(blobs["feature"]) == b"class A { int x; }"
+        with pytest.raises(KeyError):
+            cat.read("0" * 40)
+        # the process survives a missing object
+        assert cat.read(files[1][2]["feature"]) == b"class B {}"
+
+def test_resolve_accepts_branches_tags_and_shas(repo):
+    git(repo, "tag", "v1", "main")
+    sha = resolve(str(repo), "main")
+    assert resolve(str(repo), "v1") == sha == resolve(str(repo), sha[:10])
+    with pytest.raises(subprocess.CalledProcessError):
+        resolve(str(repo), "no-such-ref")
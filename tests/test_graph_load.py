@@ -0,0 +1,46 @@
+import pytest
+
+pytest.importorskip("neo4j")
+pytest.importorskip("opensearchpy")
+
+from graphdb.load import GraphWriter, _add_hit
+
+class FakeSession:
+    """Records the UNWIND statements GraphWriter sends instead of running them."""
+
+    def __init__(self):
+        self.writes = []
+
+    def execute_write(self, fn, cypher, rows):
+        self.writes.append((cypher, rows))
+
+def test_cross_owner_read_target_gets_name():
+    sess = FakeSession()
+    writer = GraphWriter(sess)
+    _add_hit(writer, {
+        "id": "proc:APP.POST_PAYMENT", "kind": "Procedure", "path": "APP.POST_PAYMENT", "chunk_no": 0,
+        "edges": [{"type": "READS", "target": "dbtable:BILLING.ACCOUNTS",
+                   "path": "BILLING.ACCOUNTS", "name": "TABLE"}],
+    })
+    writer.flush()
+    (node_cypher, nodes), (edge_cypher, edges) = sess.writes
+    assert "MERGE (n:Procedure" in node_cypher and nodes == [{"id": "proc:APP.POST_PAYMENT", "path": "APP.POST_PAYMENT"}]
+    assert "MATCH (s:Procedure" in edge_cypher and "MERGE (t:Table" in edge_cypher
+    assert "-[e:READS]->" in edge_cypher
+    # the target exists only through this edge; graph_tool looks tables up by name
+    assert "t.name=coalesce(t.name, r.target_name)" in edge_cypher
+    edge, = edges
+    assert (edge["target"], edge["path"], edge["target_name"]) == ("dbtable:BILLING.ACCOUNTS", "BILLING.ACCOUNTS",
+                                                                  "BILLING.ACCOUNTS")
+    assert edge["name"] == "TABLE" and edge["web_path"] is None
+
+def test_jsp_target_name_is_file_name():
+    sess = FakeSession()
+    writer = GraphWriter(sess)
+    writer.edges_of("Action", "struts:shop:/cart", [{"type": "FORWARDS_TO", "name": "success",
+                                                     "target": "jsp:shop:src/main/webapp/WEB-INF/jsp/cart.jsp",
+                                                     "path": "/src/main/webapp/WEB-INF/jsp/cart.jsp"}])
+    writer.flush()
+    (_, (edge,)), = sess.writes
+    assert edge["target_name"] == "cart.jsp" and edge["web_path"] == "/WEB-INF/jsp/cart.jsp"
+    assert edge["repo"] == "shop"
@@ -0,0 +1,125 @@
+from indexers.java_syntax import outline, tokenize
+
+SOURCE = '''package com.acme.web;
+
+import java.util.*;
+import static java.util.Objects.requireNonNull;
+
+@Service("orders")
+public class Orders<K extends Comparable<K>, V> extends Base<K> implements Repo<K, V> {
+    private final Map<K, List<V>> byKey = new HashMap<>();
+    private static final String SQL = """
+        SELECT * FROM orders
+        WHERE id = { ?; }
+        """;
+    static final Comparator<String> BY_LEN = new Comparator<>() {
+        public int compare(String a, String b) { return a.length() - b.length(); }
+    };
+
+    @RequestMapping(value = "/orders/{id}", method = {RequestMethod.GET, RequestMethod.POST})
+    public <R extends V> Map<K, List<R>> find(@PathVariable("id") final K id,
+                                              Function<? super V, R>... fns) throws IOException {
+        Runnable r = new Runnable() {
+            public void run() { helper(); }
+        };
+        return null;
+    }
+
+    enum Status {
+        OPEN("o") {
+            @Override String label() { return "open"; }
+        },
+        CLOSED("c");
+        Status(String code) { }
+        abstract String label();
+    }
+
+    static class Inner {
+        Inner(int x) { }
+        class Deeper { void go() { } }
+    }
+}
+'''
+
+def _types():
+    return {t["qualname"]: t for t in outline(SOURCE)["types"]}
+
+def _members(t):
+    return {m["name"]: m for m in t["fields"] + t["methods"]}
+
+def test_package_and_imports():
+    o = outline(SOURCE)
+    assert o["package"] == "com.acme.web"
+    assert o["imports"] == ["java.util.*", "static java.util.Objects.requireNonNull"]
+
+def test_generic_signatures():
+    orders = _types()["Orders"]
+    assert orders["header"] == "public class Orders<K extends Comparable<K>, V> extends Base<K> implements Repo<K, V>"
+    find = _members(orders)["find"]
+    assert find["params"] == ["K", "Function<? super V, R>..."]
+    assert find["signature"].startswith("public <R extends V> Map<K, List<R>> find(")
+    # the declaration starts at its annotation
+    assert (find["start"], find["end"]) == (17, 24)
+
+def test_annotations_with_arguments():
+    orders = _types()["Orders"]
+    assert orders["annotations"] == ["@Service"]
+    assert (orders["start"], orders["end"]) == (6, 39)
+    find = _members(orders)["find"]
+    # annotation arguments are not mistaken for a parameter list
+    assert find["annotations"] == ["@RequestMapping"]
+    assert find["kind"] == "method"
+
+def test_text_block_field():
+    sql = _members(_types()["Orders"])["SQL"]
+    assert sql["kind"] == "field"
+    assert (sql["start"], sql["end"]) == (9, 12)
+
+def test_anonymous_classes_stay_inside_their_member():
+    types = _types()
+    members = _members(types["Orders"])
+    assert members["BY_LEN"]["kind"] == "field"
+    assert (members["BY_LEN"]["start"], members["BY_LEN"]["end"]) == (13, 15)
+    assert "compare" not in members and "run" not in members
+    assert not any(q.endswith("Comparator") or q.endswith("Runnable") for q in types)
+
+def test_enum_constants_with_bodies():
+    status = _types()["Orders.Status"]
+    assert status["kind"] == "enum"
+    assert status["constants"] == ["OPEN", "CLOSED"]
+    members = _members(status)
+    assert members["Status"]["kind"] == "constructor"
+    assert members["Status"]["params"] == ["String"]
+    assert members["label"]["start"] == 32
+
+def test_nested_types():
+    types = _types()
+    assert list(types) == ["Orders", "Orders.Status", "Orders.Inner", "Orders.Inner.Deeper"]
+    inner = types["Orders.Inner"]
+    assert _members(inner)["Inner"]["kind"] == "constructor"
+    assert (inner["start"], inner["end"]) == (35, 38)
+    assert _members(types["Orders.Inner.Deeper"])["go"]["params"] == []
+
+def test_record_compact_constructor():
+    o = outline('''public record Range<T>(int lo, List<T> items) {
+    public Range {
+        if (lo < 0) throw new IllegalArgumentException();
+    }
+    Range(int lo) { this(lo, List.of()); }
+    static int zero() { return 0; }
+}''')
+    (rec,) = o["types"]
+    assert rec["kind"] == "record"
+    ctors = [m for m in rec["methods"] if m["kind"] == "constructor"]
+    assert [(m["params"], m["start"], m["end"]) for m in ctors] == [
+        (["int", "List<T>"], 2, 4), (["int"], 5, 5)]
+    assert [m["name"] for m in rec["methods"]] == ["Range", "Range", "zero"]
+    assert rec["fields"] == []
+
+def test_tokenize_literals_comments_and_lines():
+    toks = tokenize('String s = """\n  a "q" \\""" b\n  """; // x { y\nchar c = \'}\'; /* { */ int n = 0x1F;')
+    assert [(t.kind, t.line) for t in toks if t.value in (";", "n")] == [("op", 3), ("op", 4), ("ident", 4), ("op", 4)]
+    lits = [t.value for t in toks if t.kind == "lit"]
+    assert lits == ['"""\n  a "q" \\""" b\n  """', "'}'"]
+    assert not any(t.value in ("{", "}", "x", "y") for t in toks)
+    assert ("number", "0x1F") in [(t.kind, t.value) for t in toks]
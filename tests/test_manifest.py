@@ -0,0 +1,98 @@
+import os
+import pytest
+
+from indexers import manifest
+from indexers.manifest import Manifest, blob_sha
+
+IDENTITY = {"index": "traceit_docs_v1", "extractors": 1}
+
+@pytest.fixture(autouse=True)
+def manifest_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(manifest, "MANIFEST_DIR", str(tmp_path / "manifests"))
+    return tmp_path
+
+def _file(tmp_path, name, data):
+    path = tmp_path / name
+    path.write_bytes(data)
+    return os.stat(path)
+
+def test_blob_sha_matches_git():
+    # `git hash-object` of "hello\n"
+    assert blob_sha(b"hello\n") == "ce013625030ba8dba906f756967f9e9ca394464a"
+
+def test_unchanged_and_update(tmp_path):
+    st = _file(tmp_path, "A.java", b"class A {}")
+    m = Manifest("repo", identity=IDENTITY)
+    assert not m.unchanged("A.java", st)
+    assert m.update("A.java", st, "sha1", ["code:repo:A", "code:repo:A.x"]) == []
+    assert m.unchanged("A.java", st)
+    # same size, newer mtime: re-read, but same content and ids need no re-ship
+    os.utime(tmp_path / "A.java", ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert not m.unchanged("A.java", os.stat(tmp_path / "A.java"))
+    assert m.same_content("A.java", "sha1", ["code:repo:A.x", "code:repo:A"])
+    assert not m.same_content("A.java", "sha2", ["code:repo:A", "code:repo:A.x"])
+
+def test_update_returns_stale_ids():
+    m = Manifest("repo", identity=IDENTITY)
+    m.update("A.java", None, "sha1", ["a", "a.x", "a.y"])
+    assert m.update("A.java", None, "sha2", ["a", "a.z", "a"]) == ["a.x", "a.y"]
+    assert m.entries["A.java"]["ids"] == ["a", "a.z"]
+
+def test_unchanged_blob():
+    m = Manifest("repo", identity=IDENTITY)
+    assert not m.unchanged_blob("A.java", "sha1")
+    m.update("A.java", None, "sha1", ["a"])
+    assert m.unchanged_blob("A.java", "sha1")
+    assert not m.unchanged_blob("A.java", "sha2")
+
+def test_vanished_returns_ids_of_unseen_files():
+    m = Manifest("repo", identity=IDENTITY)
+    m.update("A.java", None, "s", ["a"])
+    m.update("B.java", None, "s", ["b", "b.x"])
+    m.update("C.java", None, "s", ["c"])
+    m.seen.clear()
+    m.unchanged_blob("A.java", "s")
+    m.unchanged_blob("C.java", "changed")
+    assert m.vanished() == ["b", "b.x"]
+    assert sorted(m.entries) == ["A.java", "C.java"]
+
+def test_forget_drops_entries_owning_ids():
+    m = Manifest("repo", identity=IDENTITY)
+    m.update("A.java", None, "s", ["a", "a.x"])
+    m.update("B.java", None, "s", ["b"])
+    m.forget([])
+    m.forget(["a.x", "unknown"])
+    assert sorted(m.entries) == ["B.java"]
+
+def test_save_and_load_round_trip():
+    m = Manifest("repo@release/1.0", identity=IDENTITY)
+    m.update("A.java", None, "s", ["a"])
+    m.save()
+    assert os.path.basename(Manifest.path_for("repo@release/1.0")) == "repo@release_1.0.json"
+    assert Manifest.names("repo@") == ["repo@release_1.0"]
+    loaded = Manifest.load("repo@release/1.0", IDENTITY)
+    assert loaded.entries == m.entries and loaded.identity == IDENTITY
+
+def test_load_discards_other_identity(capsys):
+    m = Manifest("repo", identity=IDENTITY)
+    m.update("A.java", None, "s", ["a"])
+    m.save()
+    for identity in ({**IDENTITY, "index": "traceit_docs_v2"}, {**IDENTITY, "extractors": 2}):
+        loaded = Manifest.load("repo", identity)
+        assert loaded.entries == {} and loaded.identity == identity
+    assert "starting over" in capsys.readouterr().out
+    assert Manifest.load("missing", IDENTITY).entries == {}
+
+def test_rebind_moves_carried_over_manifests():
+    new = {**IDENTITY, "index": "new"}
+    for name, index in (("sqlite-a", "old"), ("sqlite-b@release/1.0", "old"), ("sqlite-c", "other"),
+                        ("opensearch-a", "old")):
+        m = Manifest(name, identity={**IDENTITY, "index": index})
+        m.update("X.java", None, "s", [f"{name}:x"])
+        m.save()
+    # b was reloaded into the new index itself, so it is skipped
+    Manifest.rebind("sqlite-", "old", "new", skip=["sqlite-b@release/1.0"])
+    kept = {n: bool(Manifest.load(n, new).entries)
+            for n in ("sqlite-a", "sqlite-b@release/1.0", "sqlite-c", "opensearch-a")}
+    assert kept == {"sqlite-a": True, "sqlite-b@release/1.0": False, "sqlite-c": False, "opensearch-a": False}
+    assert Manifest.load("sqlite-a", new).entries["X.java"]["ids"] == ["sqlite-a:x"]
@@ -0,0 +1,43 @@
+import asyncio
+import pytest
+
+pytest.importorskip("aiohttp")
+pytest.importorskip("opensearchpy")
+
+from indexers.jsp_el import parse_jsp
+from retrievers.opensearch_backend import OpenSearchBackend, OS_POOL_MAXSIZE, build_path_query
+
+def test_async_client_pool_size():
+    async def pool_limits():
+        backend = OpenSearchBackend()
+        # entering the client creates its connections inside the running loop
+        async with backend.async_client as client:
+            return [conn._limit for conn in client.transport.connection_pool.connections]
+    limits = asyncio.run(pool_limits())
+    assert limits == [OS_POOL_MAXSIZE]
+
+def _path_tree(value):
+    # tokens of the path_hierarchy tokenizer with "/" as delimiter
+    parts = value.split("/")
+    return {"/".join(parts[:i]) for i in range(1, len(parts) + 1) if "/".join(parts[:i])}
+
+def _matches(clause, doc):
+    (query, body), = clause.items()
+    if query == "bool":
+        return any(_matches(c, doc) for c in body["should"])
+    (field, value), = body.items()
+    name, _, sub = field.partition(".")
+    if not doc.get(name):
+        return False
+    return value in _path_tree(doc[name]) if sub == "tree" else doc[name] == value
+
+def test_path_query_finds_jsp_by_web_path():
+    jsp, = parse_jsp("shop", "src/main/webapp/WEB-INF/jsp/cart/view.jsp", b"<p>${cart.total}</p>")
+    other, = parse_jsp("shop", "src/main/webapp/index.jsp", b"<p>home</p>")
+    assert jsp["web_path"] == "/WEB-INF/jsp/cart/view.jsp"
+    for fragment in ("/WEB-INF/jsp", "/WEB-INF/jsp/", "/WEB-INF/jsp/cart/view.jsp",
+                     "/src/main/webapp/WEB-INF/jsp"):
+        query = build_path_query(fragment)
+        assert _matches(query, jsp), fragment
+        assert not _matches(query, other), fragment
+    assert not _matches(build_path_query("/WEB-INF/js"), jsp)
@@ -0,0 +1,24 @@
+import pytest
+
+from retrievers import pipeline
+from retrievers.sqlite_backend import SQLiteBackend
+
+@pytest.fixture
+def backend(tmp_path, monkeypatch):
+    backend = SQLiteBackend(str(tmp_path / "index.db"))
+    monkeypatch.setattr(pipeline, "_backend", backend)
+    monkeypatch.setattr(pipeline, "search_cache", pipeline.QueryCache())
+    pipeline.bulk([{"id": "a", "kind": "Code", "repo": "r", "path": "/a", "text": "premium amount"}])
+    return backend
+
+def test_profiled_search_warms_the_cache(backend):
+    hits, profile = pipeline.search_profiled("premium", {"size": 5})
+    assert [h["id"] for h in hits] == ["a"] and profile["cache"] == "bypassed"
+    assert pipeline.search("premium", {"size": 5}) == hits
+    assert (pipeline.search_cache.hits, pipeline.search_cache.misses) == (1, 0)
+
+def test_generation_bump_invalidates_cache(backend):
+    pipeline.search("premium")
+    pipeline.upsert({"id": "b", "kind": "Code", "repo": "r", "path": "/b", "text": "premium"})
+    assert {h["id"] for h in pipeline.search("premium")} == {"a", "b"}
+    assert pipeline.search_cache.misses == 2
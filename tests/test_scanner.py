@@ -0,0 +1,44 @@
+import os
+
+from indexers.scanner import matcher, scan
+
+def _tree(root, files):
+    for rel in files:
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("x")
+
+def _scan(root, patterns, **kw):
+    return sorted((name, os.path.relpath(entry.path, root).replace(os.sep, "/"))
+                  for name, entry in scan(str(root), patterns, **kw))
+
+def test_first_matching_extractor_wins():
+    match = matcher({"struts": ["struts*.xml"], "xml": ["*.xml"], "java": ["*.java"]})
+    assert match("struts-config.xml") == "struts"
+    assert match("tiles-defs.xml") == "xml"
+    assert match("Cart.java") == "java"
+    assert match("Cart.class") is None
+    # order decides, not specificity
+    assert matcher({"xml": ["*.xml"], "struts": ["struts*.xml"]})("struts.xml") == "xml"
+
+def test_scan_dispatches_each_file_once(tmp_path):
+    _tree(tmp_path, ["src/A.java", "web/WEB-INF/struts-config.xml", "web/WEB-INF/web.xml",
+                     "web/index.jsp", "README.md"])
+    assert _scan(tmp_path, {"java": ["*.java"], "jsp": ["*.jsp", "*.jspf"],
+                            "struts": ["struts*.xml"], "xml": ["*.xml"]}) == [
+        ("java", "src/A.java"), ("jsp", "web/index.jsp"),
+        ("struts", "web/WEB-INF/struts-config.xml"), ("xml", "web/WEB-INF/web.xml")]
+
+def test_scan_prunes_ignored_dirs(tmp_path):
+    _tree(tmp_path, ["src/A.java", ".git/objects/B.java", "target/classes/C.java",
+                     "web/node_modules/pkg/D.java", "src/target/E.java", "src/targets/F.java"])
+    assert _scan(tmp_path, {"java": ["*.java"]}) == [
+        ("java", "src/A.java"), ("java", "src/targets/F.java")]
+    assert _scan(tmp_path, {"java": ["*.java"]}, ignore=["src"]) == [
+        ("java", ".git/objects/B.java"), ("java", "target/classes/C.java"),
+        ("java", "web/node_modules/pkg/D.java")]
+
+def test_scan_does_not_follow_dir_symlinks(tmp_path):
+    _tree(tmp_path, ["repo/src/A.java", "outside/B.java"])
+    os.symlink(tmp_path / "outside", tmp_path / "repo" / "linked")
+    assert _scan(tmp_path / "repo", {"java": ["*.java"]}) == [("java", "src/A.java")]
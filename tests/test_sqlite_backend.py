@@ -0,0 +1,118 @@
+import pytest
+
+from indexers.jsp_el import parse_jsp
+from retrievers.sqlite_backend import SQLiteBackend
+
+@pytest.fixture
+def backend(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "index.db"))
+    backend.ensure_index()
+    return backend
+
+def _load(backend, docs):
+    with backend.bulk_writer() as sink:
+        sink.extend(docs)
+    assert not sink.errors
+
+def test_find_paths_by_web_path(backend):
+    _load(backend, parse_jsp("shop", "src/main/webapp/WEB-INF/jsp/cart/view.jsp", b"<p>${cart.total}</p>")
+          + parse_jsp("shop", "src/main/webapp/WEB-INF/jspf/header.jsp", b"<p>head</p>")
+          + parse_jsp("shop", "src/main/webapp/index.jsp", b"<p>home</p>"))
+    view = "/src/main/webapp/WEB-INF/jsp/cart/view.jsp"
+    assert [h["path"] for h in backend.find_paths("/WEB-INF/jsp")] == [view]
+    assert [h["path"] for h in backend.find_paths("/WEB-INF/jsp/cart/view.jsp")] == [view]
+    assert [h["path"] for h in backend.find_paths("/src/main/webapp/WEB-INF/jsp/")] == [view]
+    assert len(backend.find_paths("/WEB-INF")) == 2
+    assert backend.find_paths("/WEB-INF/jsp", kinds=["Code"]) == []
+
+def _doc(doc_id, text, anchors=(), repo="shop", **extra):
+    return {"id": doc_id, "kind": "Code", "repo": repo, "path": f"/{doc_id}.java",
+            "text": text, "anchors": list(anchors), **extra}
+
+def test_search_boosts_anchor_matches(backend):
+    _load(backend, [_doc("in_text", "premium class lookup"),
+                    _doc("in_anchor", "class lookup table", anchors=["premium"]),
+                    _doc("no_match", "class lookup")])
+    hits = backend.search("premium", {"size": 10})
+    assert [h["id"] for h in hits] == ["in_anchor", "in_text"]
+    assert hits[0]["_sort"][0] > hits[1]["_sort"][0]
+
+def test_search_matches_identifier_parts(backend):
+    _load(backend, [_doc("el", "${contractOptions.specifiedAmount}"), _doc("other", "amount due")])
+    assert {h["id"] for h in backend.search("specified")} == {"el"}
+    assert [h["id"] for h in backend.search("specifiedAmount")][0] == "el"
+
+def test_search_collapses_chunks_per_parent(backend):
+    _load(backend, [_doc("Cart~0", "cart total", parent="Cart", chunk_no=0),
+                    _doc("Cart~1", "cart total total total", parent="Cart", chunk_no=1),
+                    _doc("Order", "order total")])
+    hits = backend.search("total", {"size": 10})
+    assert [h["id"] for h in hits] == ["Cart~1", "Order"]
+    assert hits[0]["chunk_no"] == 1 and hits[0]["parent"] == "Cart"
+
+def test_search_after_pages_in_order(backend):
+    _load(backend, [_doc(f"d{i:02d}", "alpha " + "beta " * i) for i in range(7)])
+    full = backend.search("alpha", {"size": 50})
+    assert len(full) == 7
+    assert [h["_sort"][0] for h in full] == sorted((h["_sort"][0] for h in full), reverse=True)
+    paged, after = [], None
+    while True:
+        opts = {"size": 3, **({"search_after": after} if after else {})}
+        page = backend.search("alpha", opts)
+        if not page:
+            break
+        paged += page
+        after = page[-1]["_sort"]
+    assert [h["id"] for h in paged] == [h["id"] for h in full]
+    assert [h["id"] for h in backend.search("alpha", {"size": 3, "from": 3})] == [h["id"] for h in full[3:6]]
+
+def test_search_highlights(backend):
+    _load(backend, [_doc("d", "the specified amount of the policy")])
+    hit, = backend.search("amount", {"highlight": True})
+    assert "text" not in hit
+    assert hit["highlights"] == ["the specified <em>amount</em> of the policy"]
+    hit, = backend.search("amount", {"highlight": True, "fields": ["id", "text"]})
+    assert hit["text"] == "the specified amount of the policy"
+
+def test_find_paths_by_name_parts(backend):
+    _load(backend, [_doc("CartSummaryAction", "x"), _doc("CartAction", "x"), _doc("Order", "x")])
+    assert sorted(h["path"] for h in backend.find_paths("cartSumm")) == ["/CartSummaryAction.java"]
+    assert sorted(h["path"] for h in backend.find_paths("cart")) == ["/CartAction.java", "/CartSummaryAction.java"]
+
+def test_rebuild_carries_other_repos_and_swaps_live(backend):
+    _load(backend, [_doc("a1", "shared word", repo="a"), _doc("a2", "stale word", repo="a"),
+                    _doc("b1", "shared word", repo="b")])
+    old_live, old_gen, old_identity = backend.live, backend.generation(), backend.index_identity()
+    with backend.rebuild(replace_repos=["a"]) as name:
+        assert name != old_live
+        with backend.bulk_writer(name) as sink:
+            sink.add(_doc("a1", "shared word fresh", repo="a"))
+        # readers keep seeing the old table until the swap
+        assert backend.live == old_live
+        assert {h["id"] for h in backend.search("stale")} == {"a2"}
+    assert backend.live == name
+    assert backend._meta("live") == name
+    assert backend.generation() != old_gen and backend.index_identity() != old_identity
+    assert backend.search("stale") == []
+    assert {h["id"] for h in backend.search("shared")} == {"a1", "b1"}
+    assert [h["id"] for h in backend.search("fresh")] == ["a1"]
+    tables = {r[0] for r in backend.conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+    assert old_live not in tables
+
+def test_failed_rebuild_keeps_live_table(backend):
+    _load(backend, [_doc("a1", "word", repo="a")])
+    live = backend.live
+    with pytest.raises(RuntimeError):
+        with backend.rebuild(replace_repos=["a"]) as name:
+            with backend.bulk_writer(name) as sink:
+                sink.add(_doc("a9", "other", repo="a"))
+            raise RuntimeError("load failed")
+    assert backend.live == live
+    assert [h["id"] for h in backend.search("word")] == ["a1"]
+    tables = {r[0] for r in backend.conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+    assert name not in tables
+
+def test_delete_prefix(backend):
+    _load(backend, [_doc("doc~0", "word"), _doc("doc~1", "word"), _doc("doc", "word"), _doc("docs", "word")])
+    assert backend.delete_prefix("doc~") == 2
+    assert sorted(h["id"] for h in backend.search("word")) == ["doc", "docs"]
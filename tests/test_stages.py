@@ -0,0 +1,84 @@
+import threading
+
+from indexers.stages import Pipeline, Stage
+
+def run_with_timeout(pipeline, source, timeout=10):
+    """Run in a thread so a deadlock fails the test instead of hanging it."""
+    result = {}
+    def target():
+        try:
+            pipeline.run(source)
+        except BaseException as e:
+            result["error"] = e
+    t = threading.Thread(target=target, daemon=True)
+    t.start()
+    t.join(timeout)
+    assert not t.is_alive(), "pipeline did not finish"
+    return result.get("error")
+
+def test_items_flow_through_all_stages():
+    sunk = []
+    lock = threading.Lock()
+    def sink(x):
+        with lock:
+            sunk.append(x)
+    pipeline = Pipeline("t", [Stage("double", lambda x: [x, x + 1000], threads=3, depth=2),
+                              Stage("sink", sink, depth=2, fatal=True)])
+    assert run_with_timeout(pipeline, range(100)) is None
+    assert sorted(sunk) == sorted(list(range(100)) + list(range(1000, 1100)))
+    double, sink_stage = pipeline.stages
+    assert (pipeline.source.items, double.items, double.outputs, sink_stage.items) == (100, 100, 200, 200)
+
+def test_non_fatal_error_skips_item(capsys):
+    sunk = []
+    def parse(x):
+        if x == 3:
+            raise ValueError("bad file")
+        return [x]
+    pipeline = Pipeline("t", [Stage("parse", parse), Stage("sink", sunk.append, fatal=True)])
+    assert run_with_timeout(pipeline, range(6)) is None
+    assert sunk == [0, 1, 2, 4, 5]
+    assert pipeline.stages[0].errors == 1
+    assert "[t] parse error: bad file" in capsys.readouterr().out
+
+def test_fatal_sink_error_stops_and_drains():
+    produced = []
+    sunk = []
+    failed = threading.Event()
+    def source():
+        for i in range(10_000):
+            produced.append(i)
+            yield i
+    def sink(x):
+        if x == 5:
+            failed.set()
+            raise ConnectionError("index down")
+        sunk.append((x, failed.is_set()))
+    # small queues: upstream blocks on them unless the workers drain after the stop
+    pipeline = Pipeline("t", [Stage("parse", lambda x: [x], threads=2, depth=1),
+                              Stage("sink", sink, depth=1, fatal=True)])
+    error = run_with_timeout(pipeline, source())
+    assert isinstance(error, ConnectionError)
+    assert pipeline.stages[1].errors == 1
+    # the source stopped early instead of being read to the end
+    assert len(produced) < 10_000
+    # nothing reaches the sink after the failure
+    assert not any(after for _, after in sunk)
+
+def test_source_error_is_raised():
+    def source():
+        yield 1
+        raise OSError("walk failed")
+    sunk = []
+    pipeline = Pipeline("t", [Stage("sink", sunk.append, fatal=True)])
+    error = run_with_timeout(pipeline, source())
+    # items already queued may or may not be written before the stop
+    assert isinstance(error, OSError) and sunk in ([], [1])
+
+def test_report(capsys):
+    pipeline = Pipeline("t", [Stage("sink", lambda x: None, fatal=True)])
+    assert run_with_timeout(pipeline, range(3)) is None
+    pipeline.report()
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0].startswith("[t] scan    3 in, 3 out, 0 errors")
+    assert lines[1].startswith("[t] sink    3 in, 0 out, 0 errors")
@@ -2,6 +2,7 @@ from strands import tool
 import os
 from neo4j import GraphDatabase
 from typing import Dict, List, Any
+from retrievers.pipeline import find_paths
 
 @tool(name="graph_lookup", desc="Query Neo4j for Struts action to JSP mappings and code relationships.")
 def graph_lookup(lookup_type: str, key: str) -> Dict[str, Any]:
@@ -9,7 +10,8 @@ def graph_lookup(lookup_type: str, key: str) -> Dict[str, Any]:
     Query the Neo4j graph database for code relationships.
     
     Args:
-        lookup_type: Type of lookup - 'action_to_jsp', 'jsp_to_action', 'file_relationships'
+        lookup_type: Type of lookup - 'action_to_jsp', 'jsp_to_action', 'jsp_included_by',
+            'table_writers', 'table_readers', 'file_relationships'
         key: The key to search for (action name, JSP path, etc.)
     """
     
@@ -23,24 +25,60 @@ def graph_lookup(lookup_type: str, key: str) -> Dict[str, Any]:
         
         with driver.session() as session:
             if lookup_type == "action_to_jsp":
+                # direct forwards plus pages reached through tiles definitions and includes
                 query = """
-                MATCH (a:Action {name: $key})-[:FORWARDS_TO|INCLUDES]->(j:JSP)
-                RETURN a.name as action, j.path as jsp_path, j.repo as repo
+                MATCH (a:Action) WHERE a.name = $key OR a.path = $key
+                MATCH (a)-[:FORWARDS_TO|INCLUDES]->()-[:INCLUDES|INSERTS|USES_TEMPLATE|EXTENDS*0..3]->(j:JSP)
+                RETURN DISTINCT a.name as action, j.path as jsp_path, j.repo as repo
+                LIMIT 100
                 """
                 result = session.run(query, key=key)
                 
             elif lookup_type == "jsp_to_action":
+                # key is the repo path or the context-relative path ("/WEB-INF/...")
                 query = """
-                MATCH (j:JSP {path: $key})<-[:FORWARDS_TO|INCLUDES]-(a:Action)
-                RETURN a.name as action, j.path as jsp_path, a.repo as repo
+                MATCH (j:JSP) WHERE j.path = $key OR j.web_path = $key
+                MATCH (a:Action)-[:FORWARDS_TO|INCLUDES]->()-[:INCLUDES|INSERTS|USES_TEMPLATE|EXTENDS*0..3]->(j)
+                RETURN DISTINCT a.name as action, j.path as jsp_path, a.repo as repo
+                LIMIT 100
                 """
                 result = session.run(query, key=key)
                 
+            elif lookup_type == "jsp_included_by":
+                # pages, layouts and tiles definitions that render the JSP, directly or nested
+                query = """
+                MATCH (p)-[:INCLUDES|INSERTS|USES_TEMPLATE*1..3]->(j:JSP)
+                WHERE j.path = $key OR j.web_path = $key OR j.path ENDS WITH ('/' + $key)
+                RETURN DISTINCT coalesce(p.path, p.name) as page, labels(p) as page_type, j.path as jsp_path
+                LIMIT 50
+                """
+                result = session.run(query, key=key)
+
+            elif lookup_type in ("table_writers", "table_readers"):
+                # PL/SQL units and views by ALL_DEPENDENCIES; key is TABLE or OWNER.TABLE
+                query = f"""
+                CALL {{
+                  MATCH (t:Table) WHERE t.name = $key OR t.name ENDS WITH ('.' + $key) RETURN t
+                  UNION
+                  MATCH (t:View) WHERE t.name = $key OR t.name ENDS WITH ('.' + $key) RETURN t
+                }}
+                MATCH (p)-[:{'WRITES' if lookup_type == 'table_writers' else 'READS'}]->(t)
+                RETURN p.name as object, labels(p) as object_type, t.name as table
+                LIMIT 100
+                """
+                result = session.run(query, key=key.upper())
+
             elif lookup_type == "file_relationships":
+                # classes declared in the file, and the actions those classes handle
                 query = """
                 MATCH (f:File {path: $key})-[r]-(related)
-                RETURN f.path as file_path, type(r) as relationship, 
-                       related.path as related_path, labels(related) as related_type
+                RETURN f.path as file_path, type(r) as relationship,
+                       coalesce(related.path, related.name) as related_path, labels(related) as related_type
+                LIMIT 20
+                UNION
+                MATCH (f:File {path: $key})<-[:DECLARED_IN]-(:Class)<-[r:HANDLED_BY]-(a:Action)
+                RETURN f.path as file_path, type(r) as relationship,
+                       a.path as related_path, labels(a) as related_type
                 LIMIT 20
                 """
                 result = session.run(query, key=key)
@@ -91,11 +129,15 @@ def find_struts_mapping(action_path: str) -> Dict[str, Any]:
     if not path_result.get("error") and path_result.get("results"):
         results["path_mapping"] = path_result
     
-    # Search for related files
-    if "summary" in action_name:
-        summary_result = graph_lookup("file_relationships", "*summary*")
-        if not summary_result.get("error") and summary_result.get("results"):
-            results["related_files"] = summary_result
+    # Search for related files: resolve candidate paths with an indexed
+    # path-part lookup, then query the graph by exact path
+    related = []
+    for hit in find_paths(action_name, size=5):
+        file_result = graph_lookup("file_relationships", hit["path"])
+        if not file_result.get("error") and file_result.get("results"):
+            related.append(file_result)
+    if related:
+        results["related_files"] = related
     
     return {
         "action_path": action_path,
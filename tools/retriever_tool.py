@@ -1,7 +1,10 @@
 from strands import Tool, tool
 from retrievers.pipeline import search
 
+# Agents only show short previews, so fetch highlighted fragments, not full text
+SEARCH_OPTS = {"highlight": {"fragment_size": 200, "fragments": 2}}
+
 @tool(name="code_search", desc="Search legacy code/DB index for evidence with BM25 and anchors.")
 def code_search(query: str) -> dict:
-    hits = search(query)
+    hits = search(query, SEARCH_OPTS)
     return {"hits": hits}